@@ -8,6 +8,7 @@ import asyncio
 import inspect
 import json
 import random
+import re
 from enum import Enum
 from typing import Any, Callable, List, Literal, Optional
 
@@ -15,6 +16,9 @@ from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field, create_model
 
+# JSON object wrapped in a ``` / ```json code fence
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
 # System prompts (configurable but with defaults)
 PLANNER_SYSTEM_PROMPT = """You are an AI planning assistant. Your job is to:
 1. Analyze the conversation history
@@ -564,11 +568,7 @@ IMPORTANT:
 
                 # Extract JSON
                 if content.startswith("```"):
-                    import re
-
-                    json_match = re.search(
-                        r"```(?:json)?\s*(\{.*?\})\s*```", content, re.DOTALL
-                    )
+                    json_match = _JSON_FENCE_RE.search(content)
                     if json_match:
                         content = json_match.group(1)
 
@@ -624,10 +624,7 @@ IMPORTANT:
                 content = response.content.strip()
 
                 if content.startswith("```"):
-                    import re
-                    json_match = re.search(
-                        r"```(?:json)?\s*(\{.*?\})\s*```", content, re.DOTALL
-                    )
+                    json_match = _JSON_FENCE_RE.search(content)
                     if json_match:
                         content = json_match.group(1)
 
@@ -825,11 +822,7 @@ Generate ONLY the JSON object with appropriate parameter values."""
 
                 # Extract JSON
                 if content.startswith("```"):
-                    import re
-
-                    json_match = re.search(
-                        r"```(?:json)?\s*(\{.*?\})\s*```", content, re.DOTALL
-                    )
+                    json_match = _JSON_FENCE_RE.search(content)
                     if json_match:
                         content = json_match.group(1)
 
@@ -884,10 +877,7 @@ Generate ONLY the JSON object with appropriate parameter values."""
                 content = response.content.strip()
 
                 if content.startswith("```"):
-                    import re
-                    json_match = re.search(
-                        r"```(?:json)?\s*(\{.*?\})\s*```", content, re.DOTALL
-                    )
+                    json_match = _JSON_FENCE_RE.search(content)
                     if json_match:
                         content = json_match.group(1)
 
@@ -1,7 +1,12 @@
-import random
+import contextlib
+import functools
+import mmap
+import os
+import threading
 from typing import Annotated, Sequence, TypedDict
 
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+import numpy as np
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
 from langchain_core.tools import tool
 from langgraph.graph import END, StateGraph
 from langgraph.graph.message import add_messages
@@ -14,40 +19,216 @@ from agents.nodes import CustomLLMWithTools, OutputMode
 # DOCUMENT READING TOOLS
 # ============================================================================
 
+# Bytes compared at a time while building a line index
+_INDEX_SCAN_BYTES = 1 << 20
+
+
+def _load_or_build_index(
+    path: str, data, stat: os.stat_result
+) -> tuple[np.ndarray, bool]:
+    """
+    Byte offset where each line of data starts (plus its length), and whether it has "\r"
+
+    The index is saved next to the document as <path>.idx.npy, stamped with
+    the file's mtime and size, so later processes skip the scan until the
+    file changes. An unwritable directory just means rebuilding each time.
+    """
+    index_path = path + ".idx.npy"
+    stamp = [stat.st_mtime_ns, stat.st_size]
+    try:
+        saved = np.load(index_path)
+        if saved[:2].tolist() == stamp:
+            return saved[3:], bool(saved[2])
+    except (OSError, ValueError, EOFError):
+        pass  # Missing or unreadable: rebuild
+
+    # Line ends as text-mode readlines() sees them: "\n", "\r\n" or a lone "\r".
+    # Scanned block by block so the comparison masks stay small for big files
+    arr = np.frombuffer(data, dtype=np.uint8)
+    starts = [np.zeros(1, dtype=np.int64)]
+    has_cr = False
+    for lo in range(0, arr.size, _INDEX_SCAN_BYTES):
+        block = arr[lo : lo + _INDEX_SCAN_BYTES]
+        ends = np.flatnonzero(block == 0x0A)
+        crs = np.flatnonzero(block == 0x0D)
+        if crs.size:
+            has_cr = True
+            after = crs + lo + 1  # May fall in the next block
+            followed_by_lf = np.zeros(crs.size, dtype=bool)
+            inside = after < arr.size
+            followed_by_lf[inside] = arr[after[inside]] == 0x0A
+            ends = np.sort(np.concatenate((ends, crs[~followed_by_lf])))
+        starts.append(ends + (lo + 1))
+
+    offsets = np.concatenate(starts)
+    if offsets[-1] != arr.size:
+        offsets = np.append(offsets, arr.size)  # Last line has no terminator
+
+    # Written to a temporary name and renamed, so readers never see a partial index
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.concatenate((stamp, [int(has_cr)], offsets)).astype(np.int64))
+        os.replace(tmp_path, index_path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+    return offsets, has_cr
+
+
+class _Document:
+    """A text file memory-mapped once, with the byte offset where each line starts"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.mtime = stat.st_mtime_ns
+            # mmap rejects empty files
+            self.data = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                if stat.st_size
+                else b""
+            )
+
+        self.offsets, self.has_cr = _load_or_build_index(path, self.data, stat)
+        self.total_lines = self.offsets.size - 1
+
+    def lines(self, start: int, end: int) -> list[str]:
+        """Decode lines [start, end) exactly as readlines() would return them"""
+        bounds = self.offsets[start : end + 1].tolist()
+        lines = [self.data[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+        if self.has_cr:
+            lines = [line.replace("\r\n", "\n").replace("\r", "\n") for line in lines]
+        return lines
+
+
+def _matching_lines(lines: list[str], keyword: str, first_line: int) -> list[int]:
+    """
+    Numbers of the lines containing keyword, case-insensitively
+
+    Same result as testing `keyword.lower() in line.lower()` per line, but the
+    lines are lowercased as one string and scanned with str.find. Lowercasing
+    never crosses a newline, and a match may not run past its line's newline.
+    """
+    haystack = "".join(lines).lower()
+    needle = keyword.lower()
+    found = []
+    line_no, counted_to = first_line, 0
+
+    pos = haystack.find(needle)
+    while 0 <= pos < len(haystack):
+        line_no += haystack.count("\n", counted_to, pos)
+        counted_to = pos
+        line_end = haystack.find("\n", pos) + 1 or len(haystack)
+        if pos + len(needle) <= line_end:
+            found.append(line_no)
+        # Each line counts once; a later match on a line that overruns it overruns too
+        pos = haystack.find(needle, line_end)
+    return found
+
+
+# Next section handed out when a tool is called without start_line: 0, 50, 100, ...
+# A fixed walk instead of a random one keeps tool outputs, and so the prompt
+# prefix the LLM server can cache, the same from run to run
+_next_section = 0
+# ToolNode runs the tool calls of one message in parallel threads
+_next_section_lock = threading.Lock()
+
+
+def _next_section_start(total_lines: int) -> int:
+    """Start of the next 50-line section in document order, wrapping at the end"""
+    global _next_section
+    with _next_section_lock:
+        if _next_section >= total_lines:
+            _next_section = 0
+        start = _next_section
+        _next_section += 50
+    return start
+
+
+# Documents by path, reused across tool calls until the file's mtime changes
+_DOC_CACHE: dict[str, _Document] = {}
+
+
+def _load_document(path: str) -> _Document:
+    """Return the indexed document, re-reading it only when it changes"""
+    doc = _DOC_CACHE.get(path)
+    if doc is None or doc.mtime != os.stat(path).st_mtime_ns:
+        doc = _DOC_CACHE[path] = _Document(path)
+        # Outputs keyed on the replaced document would keep its mmap alive
+        _format_chunk.cache_clear()
+        _search_section.cache_clear()
+    return doc
+
+
+# Formatted tool outputs, keyed on the document; emptied when one is reloaded
+@functools.lru_cache(maxsize=256)
+def _format_chunk(doc: _Document, start: int, end: int) -> str:
+    """read_document_chunk's output for lines [start, end)"""
+    total_lines = doc.total_lines
+    parts = [
+        f"=== DOCUMENT CHUNK (Lines {start+1} to {end}) ===\n",
+        f"Total document lines: {total_lines}\n",
+        "=" * 80 + "\n",
+    ]
+    parts.extend(
+        f"{i:4d} | {line}"
+        for i, line in enumerate(doc.lines(start, end), start=start + 1)
+    )
+    parts.append("\n" + "=" * 80)
+    parts.append(f"\nChunk contains lines {start+1}-{end} of {total_lines} total lines")
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=256)
+def _search_section(
+    doc: _Document, keyword: str, start: int, end: int
+) -> tuple[str, int]:
+    """search_document_section's output for lines [start, end), and the match count"""
+    search_lines = doc.lines(start, end)
+
+    matches = []
+    for i in _matching_lines(search_lines, keyword, first_line=start + 1):
+        context_start = max(start, i - 3)
+        context_end = min(end, i + 3)
+        context = search_lines[context_start - start : context_end - start]
+
+        match_parts = [f"\n--- Match at line {i} ---\n"]
+        for j, ctx_line in enumerate(context, start=context_start + 1):
+            prefix = ">>> " if j == i else "    "
+            match_parts.append(f"{prefix}{j:4d} | {ctx_line}")
+        matches.append("".join(match_parts))
+
+    if matches:
+        result = (
+            f"Found {len(matches)} match(es) for '{keyword}' in lines {start+1}-{end}:\n"
+            + "\n".join(matches)
+        )
+    else:
+        result = f"No matches for '{keyword}' found in lines {start+1}-{end} of {doc.total_lines}. Try searching another section."
+    return result, len(matches)
+
 
 @tool
 def read_document_chunk(start_line: int = None) -> str:
     """
-    Read a random chunk of 50 lines from input.md file
+    Read a chunk of 50 lines from input.md file
     Returns a chunk of text from the document with line numbers
     ---
-    int start_line: Optional starting line number (if not provided, reads from random position)
+    int start_line: Optional starting line number (if not provided, reads the next section in document order)
     """
     try:
-        with open("input.md", "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        doc = _load_document("input.md")
 
-        total_lines = len(lines)
+        total_lines = doc.total_lines
 
         if start_line is not None and 0 <= start_line < total_lines:
             start = start_line
         else:
-            start = random.randint(0, max(0, total_lines - 50))
+            start = _next_section_start(total_lines)
 
         end = min(start + 50, total_lines)
-        chunk_lines = lines[start:end]
-
-        formatted_chunk = f"=== DOCUMENT CHUNK (Lines {start+1} to {end}) ===\n"
-        formatted_chunk += f"Total document lines: {total_lines}\n"
-        formatted_chunk += "=" * 80 + "\n"
-
-        for i, line in enumerate(chunk_lines, start=start + 1):
-            formatted_chunk += f"{i:4d} | {line}"
-
-        formatted_chunk += "\n" + "=" * 80
-        formatted_chunk += (
-            f"\nChunk contains lines {start+1}-{end} of {total_lines} total lines"
-        )
+        formatted_chunk = _format_chunk(doc, start, end)
 
         print(f"[TOOL] Read document chunk: lines {start+1} to {end}")
         return formatted_chunk
@@ -65,41 +246,24 @@ def search_document_section(keyword: str, start_line: int = None) -> str:
     Returns lines containing the keyword with context, or a message if not found
     ---
     str keyword: The keyword or phrase to search for
-    int start_line: Optional starting line to search from (if not provided, searches random section)
+    int start_line: Optional starting line to search from (if not provided, searches the next section in document order)
     """
     try:
-        with open("input.md", "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        doc = _load_document("input.md")
 
-        total_lines = len(lines)
+        total_lines = doc.total_lines
 
         if start_line is not None and 0 <= start_line < total_lines:
             start = start_line
         else:
-            start = random.randint(0, max(0, total_lines - 50))
+            start = _next_section_start(total_lines)
 
         end = min(start + 50, total_lines)
-        search_lines = lines[start:end]
-
-        matches = []
-        for i, line in enumerate(search_lines, start=start + 1):
-            if keyword.lower() in line.lower():
-                context_start = max(start, i - 3)
-                context_end = min(end, i + 3)
-                context = lines[context_start:context_end]
-
-                match_text = f"\n--- Match at line {i} ---\n"
-                for j, ctx_line in enumerate(context, start=context_start + 1):
-                    prefix = ">>> " if j == i else "    "
-                    match_text += f"{prefix}{j:4d} | {ctx_line}"
-                matches.append(match_text)
-
-        if matches:
-            result = f"Found {len(matches)} match(es) for '{keyword}' in lines {start+1}-{end}:\n"
-            result += "\n".join(matches)
-            print(f"[TOOL] Search found {len(matches)} matches for '{keyword}'")
+        result, match_count = _search_section(doc, keyword, start, end)
+
+        if match_count:
+            print(f"[TOOL] Search found {match_count} matches for '{keyword}'")
         else:
-            result = f"No matches for '{keyword}' found in lines {start+1}-{end} of {total_lines}. Try searching another section."
             print(f"[TOOL] No matches for '{keyword}' in lines {start+1}-{end}")
 
         return result
@@ -120,9 +284,38 @@ class AgentState(TypedDict):
     iteration_count: int
 
 
+# Tool results sent to the LLM verbatim; older ones are cut to a one-line summary
+KEEP_TOOL_RESULTS = 3
+
+
+def _compact(
+    messages: Sequence[BaseMessage], keep_tool_results: int = KEEP_TOOL_RESULTS
+) -> list[BaseMessage]:
+    """
+    Copy of the history with all but the last keep_tool_results tool outputs summarized
+
+    A summarized output keeps its first line (the chunk's line range, or the
+    search's match count and range) and its tool_call_id, so every tool call
+    still has its answer. The graph state itself is not modified.
+    """
+    tool_positions = [
+        i for i, msg in enumerate(messages) if isinstance(msg, ToolMessage)
+    ]
+    compacted = list(messages)
+    for i in tool_positions[: max(0, len(tool_positions) - keep_tool_results)]:
+        old = messages[i]
+        first_line = str(old.content).split("\n", 1)[0]
+        compacted[i] = ToolMessage(
+            content=f"[summarized] {first_line}",
+            tool_call_id=old.tool_call_id,
+            name=old.name,
+        )
+    return compacted
+
+
 def agent_node(state: AgentState) -> AgentState:
     """The main agent that reasons and decides which tools to call"""
-    messages = state["messages"]
+    messages = _compact(state["messages"])
     iteration = state.get("iteration_count", 0) + 1
 
     print(f"\n{'='*80}")
@@ -140,7 +333,7 @@ def should_continue(state: AgentState) -> str:
     messages = state["messages"]
     last_message = messages[-1]
 
-    if hasattr(last_message, "tool_calls") and last_message.tool_calls:
+    if isinstance(last_message, AIMessage) and last_message.tool_calls:
         print(f"[ROUTER] Tool calls detected -> routing to tool_node")
         return "continue"
 
@@ -233,11 +426,15 @@ CRITICAL:
         print("=" * 80)
 
         # Get the last AI message
-        ai_messages = [
-            msg for msg in final_state["messages"] if isinstance(msg, AIMessage)
-        ]
-        if ai_messages:
-            last_ai_message = ai_messages[-1]
+        last_ai_message = next(
+            (
+                msg
+                for msg in reversed(final_state["messages"])
+                if isinstance(msg, AIMessage)
+            ),
+            None,
+        )
+        if last_ai_message is not None:
             if last_ai_message.content:
                 print(last_ai_message.content)
             else:
@@ -245,10 +442,7 @@ CRITICAL:
                 print(f"Last message object: {last_ai_message}")
 
                 # Check if there are tool calls
-                if (
-                    hasattr(last_ai_message, "tool_calls")
-                    and last_ai_message.tool_calls
-                ):
+                if last_ai_message.tool_calls:
                     print(
                         f"\nNote: Message contains tool calls: {last_ai_message.tool_calls}"
                     )
@@ -1,12 +1,31 @@
 import asyncio
 import logging
-import uuid
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from langchain_openai import ChatOpenAI
+from openai import RateLimitError
 from pydantic import BaseModel, Field
 
+try:
+    import re2 as _re_engine  # Linear-time DFA matching when google-re2 is installed
+except ImportError:
+    import re as _re_engine
+
+# Every character str.isspace() accepts except "\n" (full-width U+3000 and
+# NBSP included). Spelled out because re2's \s only covers ASCII whitespace
+_HSPACE = "\t\v\f\r\x1c-\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
+
+# Markdown ATX header line, e.g. "## Section title"; the text is stripped and
+# must be non-empty, matching the old per-line strip() + re.match
+_HEADER_RE = _re_engine.compile(
+    f"(?m)^[{_HSPACE}]*(#{{1,6}})[{_HSPACE}]+([^{_HSPACE}\\n].*?)[{_HSPACE}]*$"
+)
+
+# Maps every sentence terminator to "." so sentences split with one str.split
+_SENTENCE_END_TRANS = str.maketrans({"!": ".", "?": "."})
+
 
 # Pydantic models for structured outputs
 class SummaryPointsResponse(BaseModel):
@@ -21,12 +40,13 @@ class LinkInfo(BaseModel):
     common_topic: Optional[str] = Field(default=None, description="Common topic connecting the chunks")
 
 
-class ChunkLinksResponse(BaseModel):
-    """Response model for chunk linking analysis."""
-    links: List[LinkInfo] = Field(description="Link information for each summary point")
+class PairLinksResponse(BaseModel):
+    """Response model for linking a pair of adjacent chunks in both directions."""
+    forward_links: List[LinkInfo] = Field(description="Link information for each summary point of the previous chunk towards the next chunk")
+    backward_links: List[LinkInfo] = Field(description="Link information for each summary point of the next chunk towards the previous chunk")
 
 
-@dataclass
+@dataclass(slots=True)
 class SummaryPoint:
     """Represents a summary point with linking information."""
     text: str
@@ -34,32 +54,34 @@ class SummaryPoint:
     next_link: Optional[Dict[str, str]] = None  # {"relation": "...", "common_topic": "..."}
 
 
+@dataclass(slots=True, eq=False)
 class Chunk:
     """Represents a text chunk with metadata and optional LLM-based linking."""
 
-    def __init__(
-        self,
-        content: str,
-        source_file: str,
-        chunk_index: int,
-        start_char: int,
-        end_char: int,
-        headers: List[str] = None,
-        metadata: Dict = None,
-        summary_points: List[SummaryPoint] = None,
-    ):
-        self.id = str(uuid.uuid4())
-        self.content = content
-        self.source_file = source_file
-        self.chunk_index = chunk_index
-        self.start_char = start_char
-        self.end_char = end_char
-        self.headers = headers or []
-        self.metadata = metadata or {}
-        self.summary_points = summary_points or []
+    content: str
+    source_file: str
+    chunk_index: int
+    start_char: int
+    end_char: int
+    headers: List[str] = field(default_factory=list)
+    metadata: Dict = field(default_factory=dict)
+    summary_points: List[SummaryPoint] = field(default_factory=list)
+    id: str = field(init=False)
+
+    def __post_init__(self):
+        # Deterministic: re-ingesting the same file yields the same IDs
+        self.id = f"{self.source_file}:{self.chunk_index:08x}"
 
     def to_dict(self) -> Dict:
         """Convert chunk to dictionary representation."""
+        summary_points = [None] * len(self.summary_points)
+        for i, sp in enumerate(self.summary_points):
+            summary_points[i] = {
+                "text": sp.text,
+                "prev_link": sp.prev_link,
+                "next_link": sp.next_link,
+            }
+
         return {
             "id": self.id,
             "content": self.content,
@@ -69,16 +91,50 @@ class Chunk:
             "end_char": self.end_char,
             "headers": self.headers,
             "metadata": self.metadata,
-            "summary_points": [
-                {
-                    "text": sp.text,
-                    "prev_link": sp.prev_link,
-                    "next_link": sp.next_link,
-                }
-                for sp in self.summary_points
-            ],
+            "summary_points": summary_points,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Chunk":
+        """
+        Rebuild a chunk (including its ID) from `to_dict` output.
+
+        Like `to_dict`, the chunk and `data` share the metadata dict, so
+        `data` stays equal to `chunk.to_dict()` (header_levels as a tuple).
+        """
+        metadata = data["metadata"]
+        if "header_levels" in metadata:
+            metadata["header_levels"] = tuple(metadata["header_levels"])
+
+        chunk = cls(
+            content=data["content"],
+            source_file=data["source_file"],
+            chunk_index=data["chunk_index"],
+            start_char=data["start_char"],
+            end_char=data["end_char"],
+            headers=data["headers"],
+            metadata=metadata,
+            summary_points=[SummaryPoint(**sp) for sp in data["summary_points"]],
+        )
+        chunk.id = data["id"]
+        return chunk
+
+
+class RequestRateLimiter:
+    """Spaces request starts evenly to stay under a requests-per-minute budget."""
+
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        """Wait until the next request slot is available."""
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
 
 class SemanticChunker:
     """Chunks markdown content preserving structure with optional LLM-based linking."""
@@ -93,27 +149,44 @@ class SemanticChunker:
         llm_model: str = "gpt-4",
         llm_concurrency: int = 20,
         llm_temperature: float = 0.3,
+        llm_rate_limit_rpm: Optional[int] = None,
+        chunking_mode: str = "window",
     ):
         """
         Initialize with size constraints and optional LLM linking.
         
         Args:
             chunk_size: Maximum size of each chunk
-            overlap: Overlap between chunks
+            overlap: Overlap between chunks (window mode)
             enable_llm_linking: Whether to enable LLM-based chunk linking
             llm_api_key: API key for LLM service
             llm_base_url: Base URL for LLM service (optional, for custom endpoints)
             llm_model: Model to use for LLM operations
             llm_concurrency: Maximum concurrent LLM API calls
             llm_temperature: Temperature for LLM operations
+            llm_rate_limit_rpm: Maximum LLM requests per minute (optional, unlimited if None)
+            chunking_mode: How sections larger than chunk_size are split:
+                "window" - fixed windows of chunk_size advancing by chunk_size - overlap
+                "paragraph" - greedy packing of paragraphs, then sentences (no overlap)
         """
+        if chunking_mode not in ("window", "paragraph"):
+            raise ValueError(f"Unknown chunking_mode: {chunking_mode}")
+        if chunking_mode == "window" and not 0 <= overlap < chunk_size:
+            raise ValueError("overlap must be >= 0 and smaller than chunk_size")
+
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.chunking_mode = chunking_mode
         self.enable_llm_linking = enable_llm_linking
         self.llm_concurrency = llm_concurrency
         
-        # Create semaphore for LLM API rate limiting
+        # Cap in-flight LLM requests, and optionally pace them to the provider's RPM
         self.llm_semaphore = asyncio.Semaphore(llm_concurrency) if enable_llm_linking else None
+        self.rate_limiter = (
+            RequestRateLimiter(llm_rate_limit_rpm)
+            if enable_llm_linking and llm_rate_limit_rpm
+            else None
+        )
         
         if enable_llm_linking:
             if not llm_api_key:
@@ -130,32 +203,48 @@ class SemanticChunker:
             
             self.llm = ChatOpenAI(**llm_kwargs)
             
-            # Create structured output chains
-            self.summary_chain = self.llm.with_structured_output(SummaryPointsResponse)
-            self.linking_chain = self.llm.with_structured_output(ChunkLinksResponse)
+            # Create structured output chains; 429s back off with jitter instead of failing
+            retry_kwargs = {
+                "retry_if_exception_type": (RateLimitError,),
+                "wait_exponential_jitter": True,
+                "stop_after_attempt": 6,
+            }
+            self.summary_chain = self.llm.with_structured_output(
+                SummaryPointsResponse
+            ).with_retry(**retry_kwargs)
+            self.pair_link_chain = self.llm.with_structured_output(
+                PairLinksResponse
+            ).with_retry(**retry_kwargs)
 
     def chunk_markdown(self, md_content: str, source_file: str) -> List[Chunk]:
         """
         Chunk markdown preserving structure with optional LLM linking.
-        Sync version - creates event loop if LLM linking is needed.
+        Sync version - runs LLM linking with asyncio.run, so it must not be
+        called from a running event loop (use chunk_markdown_async there).
         """
         chunks = self._do_basic_chunking(md_content, source_file)
 
         # Apply LLM-based linking if enabled
         if self.enable_llm_linking and chunks:
-            # Run async linking in a new event loop
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
             try:
-                chunks = loop.run_until_complete(self._apply_llm_linking_async(chunks))
-            finally:
-                loop.close()
-                asyncio.set_event_loop(None)
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self._apply_llm_linking_async(chunks))
+            raise RuntimeError(
+                "chunk_markdown cannot run LLM linking inside a running event loop; "
+                "use chunk_markdown_async in async contexts"
+            )
 
         return chunks
     
     async def chunk_markdown_async(self, md_content: str, source_file: str) -> List[Chunk]:
-        """Async version of chunk_markdown for use in async contexts."""
+        """
+        Async version of chunk_markdown for use in async contexts.
+
+        Preferred entry point for batch pipelines: reusing one SemanticChunker
+        inside one event loop reuses the LLM client's HTTP connection pool
+        across documents.
+        """
         chunks = self._do_basic_chunking(md_content, source_file)
 
         # Apply LLM-based linking if enabled
@@ -170,69 +259,77 @@ class SemanticChunker:
         
         Strategy:
         1. Split on markdown headers first (##, ###, etc.)
-        2. If section > chunk_size, split on paragraphs
-        3. If paragraph > chunk_size, split on sentences
-        4. Maintain overlap with previous chunk
+        2. If section <= chunk_size, keep it as one chunk
+        3. If section > chunk_size:
+           - window mode: fixed chunk_size windows overlapping by self.overlap
+           - paragraph mode: split on paragraphs, then sentences if still too large
         """
-        import re
-        
         chunks = []
         chunk_index = 0
 
-        # First, split by main headers
-        header_pattern = r"^(#{1,6})\s+(.*)$"
-        lines = md_content.split("\n")
+        # Chunk each section as soon as its boundary is found
+        for section_text, headers in self._iter_sections(md_content):
+            section_chunks = self._chunk_section(
+                section_text, source_file, headers, chunk_index
+            )
+            chunks.extend(section_chunks)
+            chunk_index += len(section_chunks)
 
-        sections = []  # List of (start_idx, end_idx, headers) tuples
-        current_headers = []
-        section_start = 0
+        return chunks
 
-        for i, line in enumerate(lines):
-            match = re.match(header_pattern, line.strip())
-            if match:
-                # Found a header
-                header_level = len(match.group(1))  # Number of # symbols
-                header_text = match.group(2)
+    def _iter_sections(
+        self, md_content: str
+    ) -> Iterator[Tuple[str, Tuple[Tuple[int, str], ...]]]:
+        """
+        Yield (section_text, headers) for each header-delimited section.
 
-                # Update headers list based on hierarchy
-                current_headers = current_headers[: header_level - 1]  # Keep parent headers
-                current_headers.append((header_level, header_text))
+        Headers are (level, text) tuples for the hierarchy in effect for the
+        section. The tuple is immutable, so it is shared rather than copied.
+        """
+        # Cheap substring scan first: no "#" anywhere means no headers to match
+        if "#" not in md_content:
+            yield md_content, ()
+            return
 
-                # If we have content since last section, save it
-                if i > section_start:
-                    sections.append((section_start, i, current_headers.copy()))
+        current_headers = ()
+        section_start = 0
 
-                # Start new section after header line
-                section_start = i + 1
+        for match in _HEADER_RE.finditer(md_content):
+            header_text = match.group(2)
 
-        # Add the final section
-        if section_start < len(lines):
-            sections.append((section_start, len(lines), current_headers.copy()))
+            # If we have content since last section, emit it under the headers
+            # that were in effect for it
+            if match.start() > section_start:
+                yield md_content[section_start : match.start() - 1], current_headers
 
-        # Process each section
-        for start_idx, end_idx, headers in sections:
-            section_text = "\n".join(lines[start_idx:end_idx])
-            section_chunks = self._chunk_section(
-                section_text, source_file, headers, chunk_index
+            # Update headers based on hierarchy, keeping parent headers
+            header_level = len(match.group(1))  # Number of # symbols
+            current_headers = current_headers[: header_level - 1] + (
+                (header_level, header_text),
             )
-            chunks.extend(section_chunks)
-            chunk_index += len(section_chunks)
 
-        return chunks
+            # Start new section after header line
+            section_start = match.end() + 1
+
+        # Emit the final section
+        if section_start <= len(md_content):
+            yield md_content[section_start:], current_headers
 
     def _chunk_section(
         self,
         section_text: str,
         source_file: str,
-        headers: List[Tuple[int, str]],
+        headers: Tuple[Tuple[int, str], ...],
         base_chunk_index: int,
     ) -> List[Chunk]:
         """Chunk a single section of markdown."""
-        import re
-        
         chunks = []
         chunk_index = base_chunk_index
 
+        # Header views shared by every chunk of this section
+        header_texts = [h[1] for h in headers]
+        header_levels = tuple(h[0] for h in headers)
+
         # If the section is small enough, keep as one chunk
         if len(section_text) <= self.chunk_size:
             chunk = Chunk(
@@ -241,26 +338,41 @@ class SemanticChunker:
                 chunk_index=chunk_index,
                 start_char=0,
                 end_char=len(section_text),
-                headers=[h[1] for h in headers],
-                metadata={"header_levels": [h[0] for h in headers]},
+                headers=header_texts,
+                metadata={"header_levels": header_levels},
             )
             chunks.append(chunk)
             return chunks
 
+        if self.chunking_mode == "window":
+            return self._split_sliding_window(
+                section_text, source_file, header_texts, chunk_index, header_levels
+            )
+
+        # A single oversized paragraph goes straight to the sentence splitter
+        if "\n\n" not in section_text:
+            return self._split_large_paragraph(
+                section_text, source_file, header_texts, chunk_index, header_levels
+            )
+
         # Otherwise, break down further
         paragraphs = section_text.split("\n\n")
-        current_chunk = ""
-        current_headers = [h[1] for h in headers]
+        # Collect paragraphs and join once per chunk; current_len tracks the joined length
+        current_parts = []
+        current_len = 0
 
         for para in paragraphs:
             # Check if adding this paragraph would exceed chunk size
-            if len(current_chunk) + len(para) <= self.chunk_size:
-                if current_chunk:
-                    current_chunk += "\n\n" + para
+            if current_len + len(para) <= self.chunk_size:
+                if current_len:
+                    current_parts.append(para)
+                    current_len += 2 + len(para)
                 else:
-                    current_chunk = para
+                    current_parts = [para]
+                    current_len = len(para)
             else:
                 # Current chunk is full, save it
+                current_chunk = "\n\n".join(current_parts)
                 if current_chunk.strip():
                     chunk = Chunk(
                         content=current_chunk,
@@ -268,8 +380,8 @@ class SemanticChunker:
                         chunk_index=chunk_index,
                         start_char=0,
                         end_char=0,
-                        headers=current_headers,
-                        metadata={"header_levels": [str(h[0]) for h in headers]},
+                        headers=header_texts,
+                        metadata={"header_levels": header_levels},
                     )
                     chunks.append(chunk)
                     chunk_index += 1
@@ -277,15 +389,18 @@ class SemanticChunker:
                 # Start new chunk
                 if len(para) > self.chunk_size:
                     subchunks = self._split_large_paragraph(
-                        para, source_file, current_headers, chunk_index
+                        para, source_file, header_texts, chunk_index, header_levels
                     )
                     chunks.extend(subchunks)
                     chunk_index += len(subchunks)
-                    current_chunk = ""
+                    current_parts = []
+                    current_len = 0
                 else:
-                    current_chunk = para
+                    current_parts = [para]
+                    current_len = len(para)
 
         # Add the final chunk if there's content left
+        current_chunk = "\n\n".join(current_parts)
         if current_chunk.strip():
             chunk = Chunk(
                 content=current_chunk,
@@ -293,42 +408,86 @@ class SemanticChunker:
                 chunk_index=chunk_index,
                 start_char=0,
                 end_char=0,
-                headers=current_headers,
-                metadata={"header_levels": [str(h[0]) for h in headers]},
+                headers=header_texts,
+                metadata={"header_levels": header_levels},
             )
             chunks.append(chunk)
 
         return chunks
 
+    def _split_sliding_window(
+        self,
+        section_text: str,
+        source_file: str,
+        headers: List[str],
+        base_chunk_index: int,
+        header_levels: Tuple[int, ...] = (),
+    ) -> List[Chunk]:
+        """
+        Split a section into fixed-size windows that overlap by self.overlap.
+
+        Window i covers [i * stride, i * stride + chunk_size) with
+        stride = chunk_size - overlap; the last window may be shorter.
+        Whitespace-only windows are skipped.
+        """
+        chunks = []
+        chunk_index = base_chunk_index
+        size = self.chunk_size
+        stride = size - self.overlap
+        text_len = len(section_text)
+        num_windows = max(1, -(-(text_len - size) // stride) + 1)
+
+        for start in range(0, num_windows * stride, stride):
+            content = section_text[start : start + size]
+            if not content.strip():
+                continue
+            chunks.append(
+                Chunk(
+                    content=content,
+                    source_file=source_file,
+                    chunk_index=chunk_index,
+                    start_char=start,
+                    end_char=start + len(content),
+                    headers=headers,
+                    metadata={"header_levels": header_levels},
+                )
+            )
+            chunk_index += 1
+
+        return chunks
+
     def _split_large_paragraph(
         self,
         paragraph: str,
         source_file: str,
         headers: List[str],
         base_chunk_index: int,
+        header_levels: Tuple[int, ...] = (),
     ) -> List[Chunk]:
         """Split a large paragraph into smaller chunks."""
-        import re
-        
         chunks = []
         chunk_index = base_chunk_index
 
-        # Split by sentences
-        sentences = re.split(r"[.!?]+", paragraph)
-        current_chunk = ""
+        # Split by sentences; runs of terminators leave empty pieces, skipped below
+        sentences = paragraph.translate(_SENTENCE_END_TRANS).split(".")
+        current_parts = []
+        current_len = 0
 
         for sentence in sentences:
             sentence = sentence.strip()
             if not sentence:
                 continue
 
-            if len(current_chunk) + len(sentence) <= self.chunk_size:
-                if current_chunk:
-                    current_chunk += ". " + sentence
+            if current_len + len(sentence) <= self.chunk_size:
+                if current_len:
+                    current_parts.append(sentence)
+                    current_len += 2 + len(sentence)
                 else:
-                    current_chunk = sentence
+                    current_parts = [sentence]
+                    current_len = len(sentence)
             else:
                 # Current chunk is full
+                current_chunk = ". ".join(current_parts)
                 if current_chunk.strip():
                     chunk = Chunk(
                         content=current_chunk + ".",
@@ -337,7 +496,7 @@ class SemanticChunker:
                         start_char=0,
                         end_char=0,
                         headers=headers,
-                        metadata={"header_levels": [], "part_of_large_para": True},
+                        metadata={"header_levels": header_levels, "part_of_large_para": True},
                     )
                     chunks.append(chunk)
                     chunk_index += 1
@@ -358,18 +517,21 @@ class SemanticChunker:
                             end_char=0,
                             headers=headers,
                             metadata={
-                                "header_levels": [],
+                                "header_levels": header_levels,
                                 "part_of_large_para": True,
                                 "truncated": True,
                             },
                         )
                         chunks.append(chunk)
                         chunk_index += 1
-                    current_chunk = parts[-1]
+                    current_parts = [parts[-1]]
+                    current_len = len(parts[-1])
                 else:
-                    current_chunk = sentence
+                    current_parts = [sentence]
+                    current_len = len(sentence)
 
         # Add final chunk
+        current_chunk = ". ".join(current_parts)
         if current_chunk.strip():
             chunk = Chunk(
                 content=current_chunk + ("" if current_chunk.endswith((".", "!", "?")) else "."),
@@ -378,7 +540,7 @@ class SemanticChunker:
                 start_char=0,
                 end_char=0,
                 headers=headers,
-                metadata={"header_levels": [], "part_of_large_para": True},
+                metadata={"header_levels": header_levels, "part_of_large_para": True},
             )
             chunks.append(chunk)
 
@@ -390,8 +552,8 @@ class SemanticChunker:
         
         Process:
         1. Generate summaries for all chunks (concurrent)
-        2. Link each chunk with previous chunk (concurrent)
-        3. Link each chunk with next chunk (concurrent)
+        2. Link each adjacent pair of chunks in both directions with a single
+           LLM call per pair (concurrent)
         """
         # Step 1: Generate summaries for all chunks (concurrent)
         logging.info(f"Generating summaries for {len(chunks)} chunks with concurrency={self.llm_concurrency}...")
@@ -404,121 +566,97 @@ class SemanticChunker:
         
         logging.info(f"Generated summaries for {len(chunks)} chunks")
 
-        # Step 2: Link chunks with previous (concurrent)
-        logging.info("Linking chunks with previous...")
-        prev_link_tasks = []
-        for i, chunk in enumerate(chunks):
-            if i > 0:
-                prev_link_tasks.append(self._link_with_previous_async(chunks[i - 1], chunk))
-        
-        if prev_link_tasks:
-            await asyncio.gather(*prev_link_tasks)
-        
-        logging.info(f"Completed {len(prev_link_tasks)} previous links")
-
-        # Step 3: Link chunks with next (concurrent)
-        logging.info("Linking chunks with next...")
-        next_link_tasks = []
-        for i, chunk in enumerate(chunks):
-            if i < len(chunks) - 1:
-                next_link_tasks.append(self._link_with_next_async(chunk, chunks[i + 1]))
-        
-        if next_link_tasks:
-            await asyncio.gather(*next_link_tasks)
-        
-        logging.info(f"Completed {len(next_link_tasks)} next links")
+        # Step 2: Link each adjacent pair in both directions (concurrent)
+        logging.info("Linking adjacent chunks...")
+        pair_link_tasks = [
+            self._link_pair_async(chunks[i - 1], chunks[i]) for i in range(1, len(chunks))
+        ]
+
+        if pair_link_tasks:
+            await asyncio.gather(*pair_link_tasks)
+
+        logging.info(f"Completed {len(pair_link_tasks)} pair links")
 
         return chunks
 
     async def _generate_summary_async(self, content: str) -> List[SummaryPoint]:
         """Generate summary points for a chunk using LLM with concurrency control."""
-        async with self.llm_semaphore:
-            prompt = f"""Analyze the following text chunk and extract 3-5 key summary points.
+        prompt = f"""Analyze the following text chunk and extract 3-5 key summary points.
 Each point should be a concise sentence describing a main topic or idea.
 
 Text:
 {content}"""
 
-            try:
-                # Use ainvoke for async operation
-                response = await self.summary_chain.ainvoke(prompt)
-                return [SummaryPoint(text=point) for point in response.points]
-            except Exception as e:
-                logging.error(f"Error generating summary: {e}")
-                return [SummaryPoint(text="Summary generation failed")]
-
-    async def _link_with_previous_async(self, prev_chunk: Chunk, curr_chunk: Chunk):
-        """Link current chunk's summary points with previous chunk (async with concurrency control)."""
-        if not curr_chunk.summary_points:
-            return
-
-        async with self.llm_semaphore:
-            summary_texts = [sp.text for sp in curr_chunk.summary_points]
-            prompt = f"""Analyze how the current chunk relates to the previous chunk.
-
-Previous Chunk:
-{prev_chunk.content}
-
-Current Chunk:
-{curr_chunk.content}
-
-Current Summary Points:
-{chr(10).join(f"{i+1}. {text}" for i, text in enumerate(summary_texts))}
+        try:
+            response = await self._ainvoke_limited(self.summary_chain, prompt)
+            return [SummaryPoint(text=point) for point in response.points]
+        except Exception as e:
+            logging.error(f"Error generating summary: {e}")
+            return [SummaryPoint(text="Summary generation failed")]
 
-For each summary point in the current chunk, determine:
-1. Does it relate to the previous chunk? (yes/no)
-2. If yes, what is the relation? (e.g., "continues discussion", "provides example", "contrasts with")
-3. If yes, what common topic connects them?"""
+    async def _link_pair_async(self, prev_chunk: Chunk, next_chunk: Chunk):
+        """
+        Link two adjacent chunks in both directions with one LLM call.
 
-            try:
-                response = await self.linking_chain.ainvoke(prompt)
-
-                for i, link_info in enumerate(response.links):
-                    if i < len(curr_chunk.summary_points) and link_info.relates:
-                        for i, link_info in enumerate(response.links):
-                            if i < len(curr_chunk.summary_points) and link_info.relates:
-                                curr_chunk.summary_points[i].prev_link = {
-                                    "chunk_id": prev_chunk.id,
-                                    "chunk_index": prev_chunk.chunk_index,
-                                    "relation": link_info.relation or "",
-                                    "common_topic": link_info.common_topic or "",
-                                }
-            except Exception as e:
-                logging.error(f"Error linking with previous chunk: {e}")
-
-    async def _link_with_next_async(self, curr_chunk: Chunk, next_chunk: Chunk):
-        """Link current chunk's summary points with next chunk (async with concurrency control)."""
-        if not curr_chunk.summary_points:
+        Forward links describe how the previous chunk's summary points lead into
+        the next chunk; backward links describe how the next chunk's summary
+        points relate to the previous chunk.
+        """
+        if not prev_chunk.summary_points and not next_chunk.summary_points:
             return
 
-        async with self.llm_semaphore:
-            summary_texts = [sp.text for sp in curr_chunk.summary_points]
-            prompt = f"""Analyze how the current chunk relates to the next chunk.
+        prev_texts = [sp.text for sp in prev_chunk.summary_points]
+        next_texts = [sp.text for sp in next_chunk.summary_points]
+        prompt = f"""Analyze how two consecutive chunks relate to each other.
 
-Current Chunk:
-{curr_chunk.content}
+Previous Chunk:
+{prev_chunk.content}
 
 Next Chunk:
 {next_chunk.content}
 
-Current Summary Points:
-{chr(10).join(f"{i+1}. {text}" for i, text in enumerate(summary_texts))}
+Previous Chunk Summary Points:
+{chr(10).join(f"{i+1}. {text}" for i, text in enumerate(prev_texts))}
+
+Next Chunk Summary Points:
+{chr(10).join(f"{i+1}. {text}" for i, text in enumerate(next_texts))}
 
-For each summary point in the current chunk, determine:
+forward_links: for each summary point of the previous chunk, in order, determine:
 1. Does it relate to the next chunk? (yes/no)
 2. If yes, what is the relation? (e.g., "leads into", "is elaborated in", "sets up")
+3. If yes, what common topic connects them?
+
+backward_links: for each summary point of the next chunk, in order, determine:
+1. Does it relate to the previous chunk? (yes/no)
+2. If yes, what is the relation? (e.g., "continues discussion", "provides example", "contrasts with")
 3. If yes, what common topic connects them?"""
 
-            try:
-                response = await self.linking_chain.ainvoke(prompt)
-
-                for i, link_info in enumerate(response.links):
-                    if i < len(curr_chunk.summary_points) and link_info.relates:
-                        curr_chunk.summary_points[i].next_link = {
-                            "chunk_id": next_chunk.id,
-                            "chunk_index": next_chunk.chunk_index,
-                            "relation": link_info.relation or "",
-                            "common_topic": link_info.common_topic or "",
-                        }
-            except Exception as e:
-                logging.error(f"Error linking with next chunk: {e}")
+        try:
+            response = await self._ainvoke_limited(self.pair_link_chain, prompt)
+
+            for i, link_info in enumerate(response.forward_links):
+                if i < len(prev_chunk.summary_points) and link_info.relates:
+                    prev_chunk.summary_points[i].next_link = {
+                        "chunk_id": next_chunk.id,
+                        "chunk_index": next_chunk.chunk_index,
+                        "relation": link_info.relation or "",
+                        "common_topic": link_info.common_topic or "",
+                    }
+
+            for i, link_info in enumerate(response.backward_links):
+                if i < len(next_chunk.summary_points) and link_info.relates:
+                    next_chunk.summary_points[i].prev_link = {
+                        "chunk_id": prev_chunk.id,
+                        "chunk_index": prev_chunk.chunk_index,
+                        "relation": link_info.relation or "",
+                        "common_topic": link_info.common_topic or "",
+                    }
+        except Exception as e:
+            logging.error(f"Error linking chunk pair: {e}")
+
+    async def _ainvoke_limited(self, chain, prompt: str):
+        """Invoke a chain under the concurrency cap and the optional RPM limit."""
+        async with self.llm_semaphore:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            return await chain.ainvoke(prompt)
@@ -1,27 +1,5 @@
-import asyncio
-import json
-import logging
-import os
-import pickle
-import re
-import subprocess
-import tempfile
-import time
-import uuid
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-
-import chromadb
-import docx
-import html2text
-import numpy as np
-import pandas as pd
-from bs4 import BeautifulSoup
-from chromadb.config import Settings
-from openai import OpenAI
-from pptx import Presentation
-from tqdm.asyncio import tqdm
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -33,14 +11,27 @@ class DocParserConfig:
     embedding_model: str  # Model name for embeddings
     chunk_size: int = 1000  # Characters per chunk
     chunk_overlap: int = 200  # Character overlap between chunks
+    chunking_mode: str = "window"  # "window" (fixed stride, uses chunk_overlap) or "paragraph" (greedy paragraph/sentence packing)
     supported_formats: List[str] = None  # Default formats if not provided
     enable_llm_linking: bool = True  # Whether to link chunks using LLM
     llm_api_key: Optional[str] = None  # API key for LLM
     llm_model: str = "gpt-oss"  # LLM model name
     llm_base_url: str = "http://localhost:8000/v1"  # Base URL for LLM API
+    llm_concurrency: int = 20  # Max concurrent LLM requests (shared across files)
+    llm_temperature: float = 0.3  # Sampling temperature for LLM linking
+    llm_rate_limit_rpm: Optional[int] = None  # LLM requests per minute (None = unlimited)
     embed_with_summary: bool = True  # Whether to embed chunk summaries
+    chunker_file_concurrency: int = 4  # Files chunked at once (their LLM linking calls overlap)
+    consolidate: bool = True  # Write every document into output_md_path (False skips that copy)
+    embedding_max_in_flight: int = 8  # Concurrent embedding batch requests
+    embedding_max_retries: int = 5  # Retries per embedding batch (backoff with jitter)
+    embedding_cache_dtype: str = "float32"  # Cached vector precision; "float16" halves the cache (ChromaDB still gets float32)
+    chroma_batch_size: int = 256  # Records per ChromaDB upsert call (capped at Chroma's max)
+    pipeline_queue_size: int = 8  # Max items waiting between pipeline stages
     cleanup_temp: bool = False # Whether to delete temp files after processing
     cleanup_cache: bool = False # Whether to clear cache after processing
+    converter_workers: Optional[int] = None  # Processes for non-PDF conversion (None = CPU count)
+    pdf_converter_workers: int = 2  # Processes for PDF conversion (each runs MinerU)
 
     def __post_init__(self):
         if self.supported_formats is None:
@@ -53,11 +44,17 @@ class DocParserConfig:
                 ".xlsx",
                 ".pptx",
             ]
+        # Set view for O(1) extension checks during discovery, normalized to
+        # the ".ext" lowercase form os.path.splitext(...)[1].lower() produces
+        self.supported_format_set = frozenset(
+            fmt.lower() if fmt.startswith(".") else f".{fmt.lower()}"
+            for fmt in self.supported_formats
+        )
 
 
 @dataclass
 class DocParserOutput:
-    consolidated_md_path: str  # Path to final markdown file
+    consolidated_md_path: Optional[str]  # Path to final markdown file (None if consolidate=False)
     chroma_collection_name: str  # ChromaDB collection identifier
     chunk_metadata: List[Dict]  # Metadata for each chunk
     total_chunks: int
@@ -1,28 +1,78 @@
-import asyncio
-import json
-import logging
-import os
-import pickle
-import re
+import importlib.util
 import subprocess
 import tempfile
-import time
-import uuid
-from dataclasses import dataclass
+import zipfile
 from parser.configs import DocParserConfig
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import List
 
-import chromadb
 import docx
 import html2text
-import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
-from chromadb.config import Settings
-from openai import OpenAI
+from lxml import etree
 from pptx import Presentation
-from tqdm.asyncio import tqdm
+
+# Rust-based calamine reader is much faster than openpyxl when available
+_XLSX_ENGINE = (
+    "calamine" if importlib.util.find_spec("python_calamine") is not None else "openpyxl"
+)
+
+
+# WordprocessingML tags read by _docx_paragraphs
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P, _W_R, _W_HYPERLINK, _W_T, _W_BR = (_W + t for t in ("p", "r", "hyperlink", "t", "br"))
+_DOCX_RUN_TEXT = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+
+# Same settings python-docx parses with
+_DOCX_XML_PARSER = etree.XMLParser(remove_blank_text=True, resolve_entities=False)
+
+
+def _docx_paragraphs(path: str) -> List[str]:
+    """
+    Extract body paragraph text straight from word/document.xml.
+
+    Mirrors python-docx `[p.text for p in doc.paragraphs]` (top-level paragraphs;
+    runs and hyperlink runs; tabs, line breaks and no-break hyphens mapped to
+    text) without loading the package or building its object model.
+    Raises KeyError if the package has no word/document.xml.
+    """
+    with zipfile.ZipFile(path) as zf:
+        root = etree.fromstring(zf.read("word/document.xml"), _DOCX_XML_PARSER)
+
+    body = root.find(_W + "body")
+    if body is None:
+        return []
+
+    paragraphs = []
+    run_content_tags = (_W_T, _W_BR, *_DOCX_RUN_TEXT)
+    for p in body.iterchildren(_W_P):
+        parts = []
+        for child in p.iterchildren(_W_R, _W_HYPERLINK):
+            runs = (child,) if child.tag == _W_R else child.iterchildren(_W_R)
+            for run in runs:
+                for el in run.iterchildren(*run_content_tags):
+                    if el.tag == _W_T:
+                        parts.append(el.text or "")
+                    elif el.tag == _W_BR:
+                        # Page and column breaks have no text equivalent
+                        if el.get(_W + "type", "textWrapping") == "textWrapping":
+                            parts.append("\n")
+                    else:
+                        parts.append(_DOCX_RUN_TEXT[el.tag])
+        paragraphs.append("".join(parts))
+    return paragraphs
+
+
+def _read_text(path: str) -> str:
+    """
+    Read a UTF-8 text file with a single read and decode.
+
+    Newlines are normalized to "\n" the same way text-mode open() does.
+    """
+    text = Path(path).read_bytes().decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
 
 
 class DocumentConverter:
@@ -30,6 +80,17 @@ class DocumentConverter:
 
     def __init__(self, config: DocParserConfig):
         self.config = config
+        # Extension -> converter, one dict lookup per file
+        self._converters = {
+            ".pdf": self._convert_pdf,
+            ".docx": self._convert_docx,
+            ".html": self._convert_html,
+            ".htm": self._convert_html,
+            ".md": self._convert_md,
+            ".txt": self._convert_txt,
+            ".xlsx": self._convert_xlsx,
+            ".pptx": self._convert_pptx,
+        }
 
     def convert_to_markdown(self, file_path: str) -> str:
         """
@@ -40,22 +101,10 @@ class DocumentConverter:
         """
         file_ext = Path(file_path).suffix.lower()
 
-        if file_ext == ".pdf":
-            return self._convert_pdf(file_path)
-        elif file_ext == ".docx":
-            return self._convert_docx(file_path)
-        elif file_ext in [".html", ".htm"]:
-            return self._convert_html(file_path)
-        elif file_ext == ".md":
-            return self._convert_md(file_path)
-        elif file_ext == ".txt":
-            return self._convert_txt(file_path)
-        elif file_ext == ".xlsx":
-            return self._convert_xlsx(file_path)
-        elif file_ext == ".pptx":
-            return self._convert_pptx(file_path)
-        else:
+        converter = self._converters.get(file_ext)
+        if converter is None:
             raise ValueError(f"Unsupported file format: {file_ext}")
+        return converter(file_path)
 
     def _convert_pdf(self, path: str) -> str:
         """Use MinerU for PDF extraction."""
@@ -70,17 +119,23 @@ class DocumentConverter:
                     "-o",
                     temp_dir,
                 ]
-                subprocess.run(cmd, check=True)
+                subprocess.run(cmd, check=True, capture_output=True, text=True)
 
-                # MinerU typically outputs to a subdirectory named after the file
-                # Look for markdown files in the output directory
-                output_files = list(Path(temp_dir).rglob("*.md"))
+                # MinerU writes {output}/{stem}/{method}/{stem}.md, where method
+                # is "auto" unless another parse method was requested
+                stem = Path(path).stem
+                output_dir = Path(temp_dir) / stem
+                md_path = output_dir / "auto" / f"{stem}.md"
 
-                if not output_files:
-                    raise RuntimeError(f"No markdown output found for {path}")
+                if not md_path.exists():
+                    # Fall back to any method subdirectory, one level deep
+                    candidates = sorted(output_dir.glob(f"*/{stem}.md"))
+                    if not candidates:
+                        raise RuntimeError(f"No markdown output found for {path}")
+                    md_path = candidates[0]
 
                 # Read the markdown content
-                md_content = output_files[0].read_text(encoding="utf-8")
+                md_content = md_path.read_text(encoding="utf-8")
                 return md_content
 
             except subprocess.CalledProcessError as e:
@@ -89,63 +144,63 @@ class DocumentConverter:
                 raise RuntimeError(f"Failed to convert PDF {path}: {e}")
 
     def _convert_docx(self, path: str) -> str:
-        """Use python-docx or mammoth."""
+        """Read paragraphs from the document XML; python-docx as fallback."""
         if docx is None:
             raise ImportError("python-docx library is required for DOCX conversion")
 
         try:
-            doc = docx.Document(path)
-            paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
-            return "\n\n".join(paragraphs)
+            try:
+                paragraphs = _docx_paragraphs(path)
+            except KeyError:
+                # Main part stored under a non-standard name; python-docx resolves it
+                paragraphs = [p.text for p in docx.Document(path).paragraphs]
+            return "\n\n".join(p for p in paragraphs if p.strip())
         except Exception as e:
             raise RuntimeError(f"Failed to convert DOCX {path}: {e}")
 
     def _convert_html(self, path: str) -> str:
-        """Use BeautifulSoup + html2text."""
-        if BeautifulSoup is None or html2text is None:
-            raise ImportError(
-                "beautifulsoup4 and html2text libraries are required for HTML conversion"
-            )
+        """Use html2text directly on the raw HTML (it parses the markup itself)."""
+        if html2text is None:
+            raise ImportError("html2text library is required for HTML conversion")
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                content = f.read()
+            content = _read_text(path)
 
-            soup = BeautifulSoup(content, "html.parser")
+            # A fresh converter per document: HTML2Text keeps parser state
+            # (unclosed <style>/<script>, list and blockquote depth) across
+            # handle() calls, so a shared instance leaks into the next file
             h = html2text.HTML2Text()
             h.ignore_links = True
             h.body_width = 0  # Don't wrap lines
-            return h.handle(str(soup))
+            return h.handle(content)
         except Exception as e:
             raise RuntimeError(f"Failed to convert HTML {path}: {e}")
 
     def _convert_md(self, path: str) -> str:
         """Read markdown file directly."""
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read()
+            return _read_text(path)
         except Exception as e:
             raise RuntimeError(f"Failed to read MD file {path}: {e}")
 
     def _convert_txt(self, path: str) -> str:
         """Read text file directly."""
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read()
+            return _read_text(path)
         except Exception as e:
             raise RuntimeError(f"Failed to read TXT file {path}: {e}")
 
     def _convert_xlsx(self, path: str) -> str:
-        """Use openpyxl/pandas to convert tables."""
+        """Use pandas (calamine engine if installed, else openpyxl) to convert tables."""
         if pd is None:
             raise ImportError("pandas library is required for XLSX conversion")
 
         try:
-            # Read all sheets and convert to markdown tables
-            xl_file = pd.ExcelFile(path)
+            # One parse of the workbook returns every sheet, in workbook order
+            sheets_by_name = pd.read_excel(path, sheet_name=None, engine=_XLSX_ENGINE)
+
             sheets = []
-            for sheet_name in xl_file.sheet_names:
-                df = pd.read_excel(path, sheet_name=sheet_name)
+            for sheet_name, df in sheets_by_name.items():
                 # Convert DataFrame to markdown table
                 table_md = df.to_markdown(index=False)
                 sheets.append(f"## Sheet: {sheet_name}\n\n{table_md}\n")
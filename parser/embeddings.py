@@ -1,80 +1,224 @@
 import asyncio
+import hashlib
 import json
 import logging
 import os
-import pickle
-import re
-import subprocess
-import tempfile
+import sqlite3
 import time
-import uuid
-from dataclasses import dataclass
-from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 import chromadb
-import docx
-import html2text
 import numpy as np
-import pandas as pd
-from bs4 import BeautifulSoup
-from chromadb.config import Settings
-from openai import OpenAI
-from pptx import Presentation
-from tqdm.asyncio import tqdm
+from openai import AsyncOpenAI
+
+# Chunk metadata types ChromaDB stores as-is vs. ones serialized to JSON
+_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+_JSON_TYPES = frozenset({list, tuple, dict})
 
 
 class EmbeddingGenerator:
     """Generates embeddings using an OpenAI-compatible endpoint with LLM linking support."""
 
-    def __init__(self, endpoint: str, model: str):
-        """Initialize OpenAI-compatible client."""
-        self.client = OpenAI(base_url=endpoint, api_key="dummy")
+    def __init__(
+        self, endpoint: str, model: str, max_in_flight: int = 8, max_retries: int = 5
+    ):
+        """
+        Initialize async OpenAI-compatible client.
+
+        Args:
+            endpoint: Base URL of the embedding server
+            model: Embedding model name
+            max_in_flight: Maximum number of batch requests sent concurrently
+            max_retries: Retries per batch on connection errors, 408/409/429 and 5xx
+                (exponential backoff with jitter, honoring Retry-After)
+        """
+        self.aclient = AsyncOpenAI(
+            base_url=endpoint, api_key="dummy", max_retries=max_retries
+        )
         self.model = model
+        self.max_in_flight = max_in_flight
+        # Shared across concurrent generate_embeddings calls
+        self.semaphore = asyncio.Semaphore(max_in_flight)
 
     async def generate_embeddings(
-        self, chunks: List, batch_size: int = 32, include_summary: bool = False
-    ) -> List[np.ndarray]:
+        self,
+        chunks: List,
+        batch_size: int = 32,
+        include_summary: bool = False,
+        cache: Optional["EmbeddingCache"] = None,
+    ) -> np.ndarray:
         """
         Generate embeddings with batching and optional summary inclusion.
 
         Process:
-        1. Batch chunks
-        2. Optionally augment text with summary points and linking info
-        3. Send async requests to endpoint
-        4. Handle retries with exponential backoff
-        5. Return embeddings in same order
+        1. Optionally augment text with summary points and linking info
+        2. Take texts already in `cache` (if given) from it; batch the rest,
+           each distinct text once, of similar length together (less
+           server-side padding)
+        3. Send batch requests concurrently (at most max_in_flight at a time),
+           each retried with backoff by the client; store new vectors in `cache`
+        4. Return embeddings in same order as one (N, D) float32 matrix
+
+        Raises the first batch error; see generate_embeddings_isolated to keep
+        the batches that succeeded.
 
         Args:
             chunks: List of Chunk objects
             batch_size: Number of chunks to process per batch
             include_summary: Whether to include summary points in embedding text
+            cache: Content-addressed store to read and fill (None = always embed)
         """
-        embeddings = []
+        batches, results = await self._embed_all(
+            chunks, batch_size, include_summary, cache
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
 
-        # Process in batches
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i : i + batch_size]
+        if not results:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._scatter(len(chunks), batches, results)
 
-            if include_summary:
-                batch_texts = [
-                    self._prepare_text_with_summary(chunk) for chunk in batch
-                ]
-            else:
-                batch_texts = [chunk.content for chunk in batch]
+    async def generate_embeddings_isolated(
+        self,
+        chunks: List,
+        batch_size: int = 32,
+        include_summary: bool = False,
+        cache: Optional["EmbeddingCache"] = None,
+    ) -> Tuple[np.ndarray, List[Tuple[int, str]]]:
+        """
+        Like generate_embeddings, but a failed batch does not discard the others.
 
-            try:
-                response = self.client.embeddings.create(
-                    input=batch_texts, model=self.model
+        Returns:
+            - (M, D) matrix for the chunks whose batch succeeded, in chunk order
+            - [(chunk position, error message)] for every chunk whose batch failed
+        """
+        batches, results = await self._embed_all(
+            chunks, batch_size, include_summary, cache
+        )
+
+        succeeded_batches = []
+        succeeded = []
+        failed = []
+        for positions, result in zip(batches, results):
+            if isinstance(result, BaseException):
+                logging.warning(
+                    f"Embedding batch of {len(positions)} chunks failed: {result}"
                 )
+                failed.extend((position, str(result)) for position in positions)
+            else:
+                succeeded_batches.append(positions)
+                succeeded.append(result)
+        failed.sort()
+
+        if not succeeded:
+            return np.empty((0, 0), dtype=np.float32), failed
 
-                # Extract embeddings from response
-                batch_embeddings = [np.array(data.embedding) for data in response.data]
-                embeddings.extend(batch_embeddings)
-            except Exception as e:
-                raise RuntimeError(f"Failed to generate embeddings for batch: {e}")
+        matrix = self._scatter(len(chunks), succeeded_batches, succeeded)
+        if failed:
+            failed_positions = [position for position, _ in failed]
+            matrix = np.delete(matrix, failed_positions, axis=0)
+        return matrix, failed
 
-        return embeddings
+    async def _embed_all(
+        self,
+        chunks: List,
+        batch_size: int,
+        include_summary: bool,
+        cache: Optional["EmbeddingCache"] = None,
+    ) -> Tuple[List[List[int]], List]:
+        """
+        Embed every batch concurrently.
+
+        Returns the chunk positions in each batch and, per batch, its matrix
+        or the exception it raised. Cache hits come back as one extra batch;
+        identical texts are sent once and share the result of that batch.
+        """
+        if include_summary:
+            texts = [self._prepare_text_with_summary(chunk) for chunk in chunks]
+        else:
+            texts = [chunk.content for chunk in chunks]
+
+        cached_batches = []
+        cached_results = []
+        pending = range(len(texts))
+        if cache is not None:
+            keys = [self._cache_key(text) for text in texts]
+            found = cache.get_many(keys)
+            hits = [i for i, key in enumerate(keys) if key in found]
+            if hits:
+                cached_batches.append(hits)
+                cached_results.append(np.stack([found[keys[i]] for i in hits]))
+                logging.debug(f"{len(hits)}/{len(texts)} embeddings loaded from cache")
+            pending = [i for i, key in enumerate(keys) if key not in found]
+
+        # Embed each distinct text once; duplicates reuse its vector below
+        representatives = {}
+        duplicates = {}
+        for i in pending:
+            representative = representatives.setdefault(texts[i], i)
+            if representative != i:
+                duplicates.setdefault(representative, []).append(i)
+        pending = list(representatives.values())
+
+        # Batch texts of similar length together so the server pads each
+        # batch to a shorter maximum; results are scattered back by position
+        order = sorted(pending, key=lambda i: len(texts[i]))
+        batches = [order[i : i + batch_size] for i in range(0, len(order), batch_size)]
+
+        # Cap concurrent requests; gather returns results in batch order
+        async def embed_limited(positions: List[int]) -> np.ndarray:
+            async with self.semaphore:
+                return await self._embed_batch([texts[i] for i in positions])
+
+        results = await asyncio.gather(
+            *[embed_limited(b) for b in batches], return_exceptions=True
+        )
+
+        if cache is not None:
+            new_keys = []
+            new_rows = []
+            for positions, result in zip(batches, results):
+                if not isinstance(result, BaseException):
+                    new_keys.extend(keys[i] for i in positions)
+                    new_rows.append(result)
+            if new_rows:
+                cache.put_many(new_keys, np.concatenate(new_rows, axis=0))
+
+        # Fan vectors out to duplicate texts, inside the batch they rode along with
+        if duplicates:
+            for b, (positions, result) in enumerate(zip(batches, results)):
+                rows = []
+                copies = []
+                for row, i in enumerate(positions):
+                    for duplicate in duplicates.get(i, ()):
+                        rows.append(row)
+                        copies.append(duplicate)
+                if copies:
+                    batches[b] = positions + copies
+                    if not isinstance(result, BaseException):
+                        results[b] = np.concatenate([result, result[rows]], axis=0)
+
+        return cached_batches + batches, cached_results + results
+
+    def _cache_key(self, text: str) -> bytes:
+        """Content address of one embedding: hash of model name and exact input text."""
+        return hashlib.blake2b(
+            self.model.encode() + b"\0" + text.encode(), digest_size=16
+        ).digest()
+
+    @staticmethod
+    def _scatter(
+        n_chunks: int, batches: List[List[int]], results: List[np.ndarray]
+    ) -> np.ndarray:
+        """Place per-batch rows back at their chunk positions in one (N, D) matrix.
+
+        Rows of positions not covered by `batches` are left uninitialized.
+        """
+        matrix = np.empty((n_chunks, results[0].shape[1]), dtype=np.float32)
+        for positions, result in zip(batches, results):
+            matrix[positions] = result
+        return matrix
 
     def _prepare_text_with_summary(self, chunk) -> str:
         """
@@ -87,44 +231,117 @@ class EmbeddingGenerator:
         """
         parts = [chunk.content]
 
-        if hasattr(chunk, "summary_points") and chunk.summary_points:
-            # Add summary points
-            summary_text = "\n\nKey Points:\n"
+        if chunk.summary_points:
+            # Add summary points, one line each (joined once, not concatenated)
+            lines = ["\n\nKey Points:"]
             for i, sp in enumerate(chunk.summary_points, 1):
-                summary_text += f"{i}. {sp.text}\n"
+                lines.append(f"{i}. {sp.text}")
 
                 # Add context from linking
                 if sp.prev_link:
-                    summary_text += f"   (Context from previous: {sp.prev_link['relation']} regarding {sp.prev_link['common_topic']})\n"
+                    lines.append(f"   (Context from previous: {sp.prev_link['relation']} regarding {sp.prev_link['common_topic']})")
                 if sp.next_link:
-                    summary_text += f"   (Leads to: {sp.next_link['relation']} regarding {sp.next_link['common_topic']})\n"
+                    lines.append(f"   (Leads to: {sp.next_link['relation']} regarding {sp.next_link['common_topic']})")
 
-            parts.append(summary_text)
+            lines.append("")  # Keep the trailing newline
+            parts.append("\n".join(lines))
 
         return "\n".join(parts)
 
-    async def _embed_batch(self, texts: List[str]) -> List[np.ndarray]:
-        """Single batch embedding with error handling."""
+    async def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Single batch embedding with error handling; returns a (len(texts), D) matrix."""
         try:
-            response = self.client.embeddings.create(input=texts, model=self.model)
-            return [np.array(data.embedding) for data in response.data]
+            response = await self.aclient.embeddings.create(
+                input=texts, model=self.model
+            )
+            return np.asarray(
+                [data.embedding for data in response.data], dtype=np.float32
+            )
         except Exception as e:
-            raise RuntimeError(f"Failed to embed batch: {e}")
+            raise RuntimeError(f"Failed to generate embeddings for batch: {e}")
+
+
+class EmbeddingCache:
+    """Content-addressed embedding store: vectors in one SQLite file."""
+
+    # Keys per SELECT ... IN (...), well under SQLite's bound-parameter limit
+    LOOKUP_BATCH_SIZE = 500
+
+    def __init__(self, db_path: str, dtype: str = "float32"):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            db_path: SQLite file holding {key: vector bytes}
+            dtype: Storage precision; "float16" halves the cache size at a
+                small precision cost. Vectors are always returned as float32.
+        """
+        self.dtype = np.dtype(dtype)
+        # One table per storage dtype, so switching precision never misreads blobs
+        self.table = f"embeddings_{self.dtype.name}"
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(key BLOB PRIMARY KEY, vector BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self.conn.commit()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Look up many keys at once; returns {key: vector} for the ones stored."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for i in range(0, len(unique_keys), self.LOOKUP_BATCH_SIZE):
+            batch = unique_keys[i : i + self.LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM {self.table} WHERE key IN ({placeholders})",
+                batch,
+            )
+            for key, vector in rows:
+                found[key] = np.frombuffer(vector, dtype=self.dtype).astype(
+                    np.float32, copy=False
+                )
+        return found
+
+    def put_many(self, keys: List[bytes], embeddings: np.ndarray):
+        """Store one vector per key (rows of `embeddings`) in a single transaction."""
+        embeddings = np.asarray(embeddings, dtype=self.dtype)
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, vector) VALUES (?, ?)",
+                zip(keys, (row.tobytes() for row in embeddings)),
+            )
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
 
 
 class ChromaDBManager:
     """Manages ChromaDB storage and retrieval with LLM linking support."""
 
-    def __init__(self, db_path: str, collection_name: str):
-        """Initialize persistent ChromaDB client."""
+    def __init__(
+        self, db_path: str, collection_name: str, batch_size: Optional[int] = None
+    ):
+        """
+        Initialize persistent ChromaDB client.
+
+        Args:
+            db_path: Directory for the persistent database
+            collection_name: Collection to create or open
+            batch_size: Records per collection.upsert call (None = server maximum);
+                always capped at the client's max batch size
+        """
         # Ensure the directory exists
         os.makedirs(db_path, exist_ok=True)
         self.client = chromadb.PersistentClient(path=db_path)
         self.collection = self.client.get_or_create_collection(
             name=collection_name, metadata={"hnsw:space": "cosine"}
         )
+        max_batch_size = self.client.get_max_batch_size()
+        self.batch_size = min(batch_size or max_batch_size, max_batch_size)
 
-    def add_chunks(self, chunks: List, embeddings: List[np.ndarray]):
+    def add_chunks(self, chunks: List, embeddings: np.ndarray):
         """
         Add chunks with embeddings to ChromaDB, including LLM linking metadata.
 
@@ -135,24 +352,60 @@ class ChromaDBManager:
         - headers (as JSON string)
         - summary_points (as JSON string with linking info)
         - timestamp
+
+        Args:
+            chunks: List of Chunk objects
+            embeddings: (N, D) matrix (or sequence of vectors) aligned with chunks
         """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        # One timestamp per call: every chunk in it is stored at the same time
+        timestamp = str(time.time())
+
+        # Build one batch at a time (Chroma rejects writes larger than its max
+        # batch size, and this keeps only one batch of Python lists alive).
+        # Chunk IDs are deterministic, so upsert makes re-ingestion idempotent
+        # instead of silently keeping stale rows for existing IDs.
+        for i in range(0, len(chunks), self.batch_size):
+            ids, documents, metadatas = self._build_batch(
+                chunks[i : i + self.batch_size], timestamp
+            )
+            # Chroma takes the float32 ndarray slice as-is; no per-row lists
+            self.collection.upsert(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=embeddings[i : i + self.batch_size],
+            )
+
+    def _build_batch(
+        self, chunks: List, timestamp: str
+    ) -> Tuple[List[str], List[str], List[Dict]]:
+        """Build the parallel ids/documents/metadatas lists for one upsert call."""
         ids = [chunk.id for chunk in chunks]
         documents = [chunk.content for chunk in chunks]
         metadatas = []
+        dumps = json.dumps
+        # Sibling chunks of a section share headers; serialize each list once
+        headers_json = {}
 
         for chunk in chunks:
+            headers_key = tuple(chunk.headers)
+            headers = headers_json.get(headers_key)
+            if headers is None:
+                headers = headers_json[headers_key] = dumps(chunk.headers)
+
             # Convert metadata values to acceptable types for ChromaDB
             metadata = {
                 "source_file": chunk.source_file,
                 "chunk_index": str(chunk.chunk_index),
                 "start_char": str(chunk.start_char),
                 "end_char": str(chunk.end_char),
-                "headers": json.dumps(chunk.headers),
-                "timestamp": str(time.time()),
+                "headers": headers,
+                "timestamp": timestamp,
             }
 
             # Add summary points if available
-            if hasattr(chunk, "summary_points") and chunk.summary_points:
+            if chunk.summary_points:
                 summary_data = [
                     {
                         "text": sp.text,
@@ -161,29 +414,26 @@ class ChromaDBManager:
                     }
                     for sp in chunk.summary_points
                 ]
-                metadata["summary_points"] = json.dumps(summary_data)
+                metadata["summary_points"] = dumps(summary_data)
 
             # Add additional metadata, converting values as needed
             for key, value in chunk.metadata.items():
-                if isinstance(value, list):
-                    metadata[key] = json.dumps(value)
-                elif isinstance(value, dict):
-                    metadata[key] = json.dumps(value)
-                elif isinstance(value, (int, float, str, bool)) or value is None:
+                # Exact type lookups first; subclasses fall through to isinstance
+                value_type = type(value)
+                if value_type in _SCALAR_TYPES:
+                    metadata[key] = value
+                elif value_type in _JSON_TYPES:
+                    metadata[key] = dumps(value)
+                elif isinstance(value, (list, tuple, dict)):
+                    metadata[key] = dumps(value)
+                elif isinstance(value, (int, float, str, bool)):
                     metadata[key] = value
                 else:
                     metadata[key] = str(value)
 
             metadatas.append(metadata)
 
-        embeddings_list = [emb.tolist() for emb in embeddings]
-
-        self.collection.add(
-            ids=ids,
-            documents=documents,
-            metadatas=metadatas,
-            embeddings=embeddings_list,
-        )
+        return ids, documents, metadatas
 
     def query(
         self,
@@ -200,7 +450,8 @@ class ChromaDBManager:
             include_context: Whether to parse and include summary/linking info
         """
         results = self.collection.query(
-            query_embeddings=[query_embedding.tolist()], n_results=n_results
+            query_embeddings=np.asarray(query_embedding, dtype=np.float32).reshape(1, -1),
+            n_results=n_results,
         )
 
         # Format results
@@ -1,44 +1,56 @@
 import asyncio
+import contextlib
+import functools
+import hashlib
 import json
-import logging
 import os
-import pickle
-import re
-import subprocess
-import tempfile
 import time
-import uuid
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
 from parser.chunks import Chunk, SemanticChunker
 from parser.configs import DocParserConfig, DocParserOutput
 from parser.converter import DocumentConverter
-from parser.embeddings import ChromaDBManager, EmbeddingGenerator
+from parser.embeddings import ChromaDBManager, EmbeddingCache, EmbeddingGenerator
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
-import chromadb
-import docx
-import html2text
-import numpy as np
-import pandas as pd
-from bs4 import BeautifulSoup
-from chromadb.config import Settings
-from openai import OpenAI
-from pptx import Presentation
-from tqdm.asyncio import tqdm
+from utils.logger import get_log_file, setup_logger
 
-from utils.logger import setup_logger
+try:
+    import orjson  # Several times faster (de)serialization; installed with chromadb
+
+    _dump_json = orjson.dumps
+    _load_json = orjson.loads
+except ImportError:
+    def _dump_json(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    _load_json = json.loads
 
 
 class MarkdownConsolidator:
-    """Manages the consolidation of multiple markdown documents."""
+    """Manages the consolidation of multiple markdown documents.
+
+    Use as a context manager: the output file is opened (and truncated) once
+    on enter and every document is streamed into that handle.
+    """
 
     def __init__(self, output_path: str):
         self.output_path = output_path
         self.file_separator = "\n\n" + "=" * 80 + "\n\n"
+        self._fh = None
+        self._has_content = False
         # Ensure output directory exists
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
+    def __enter__(self) -> "MarkdownConsolidator":
+        self._fh = open(self.output_path, "w", encoding="utf-8", buffering=1 << 20)
+        self._has_content = False
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._fh.close()
+        self._fh = None
+
     def append_document(self, md_content: str, source_file: str):
         """
         Append markdown with metadata header
@@ -50,6 +62,9 @@ class MarkdownConsolidator:
         ---
         {content}
         """
+        if self._fh is None:
+            raise RuntimeError("MarkdownConsolidator must be used as a context manager")
+
         source_path = Path(source_file)
         header = (
             f"# SOURCE: {source_file}\n"
@@ -57,13 +72,13 @@ class MarkdownConsolidator:
             f"# FORMAT: {source_path.suffix}\n---\n"
         )
 
-        with open(self.output_path, "a", encoding="utf-8") as f:
-            # Add separator if file already has content
-            if f.tell() > 0:
-                f.write(self.file_separator)
+        # Add separator if file already has content
+        if self._has_content:
+            self._fh.write(self.file_separator)
 
-            f.write(header)
-            f.write(md_content)
+        self._fh.write(header)
+        self._fh.write(md_content)
+        self._has_content = True
 
     def finalize(self) -> str:
         """Return path to consolidated file."""
@@ -82,24 +97,33 @@ class DocumentParser:
         chunker_kwargs = {
             'chunk_size': config.chunk_size,
             'overlap': config.chunk_overlap,
-            'enable_llm_linking': getattr(config, 'enable_llm_linking', False),
+            'chunking_mode': config.chunking_mode,
+            'enable_llm_linking': config.enable_llm_linking,
         }
         
         if chunker_kwargs['enable_llm_linking']:
             chunker_kwargs.update({
-                'llm_api_key': getattr(config, 'llm_api_key', os.getenv('OPENAI_API_KEY')),
-                'llm_base_url': getattr(config, 'llm_base_url', None),
-                'llm_model': getattr(config, 'llm_model', 'gpt-4'),
-                'llm_concurrency': getattr(config, 'llm_concurrency', 20),
-                'llm_temperature': getattr(config, 'llm_temperature', 0.3),
+                'llm_api_key': config.llm_api_key or os.getenv('OPENAI_API_KEY'),
+                'llm_base_url': config.llm_base_url,
+                'llm_model': config.llm_model,
+                'llm_concurrency': config.llm_concurrency,
+                'llm_temperature': config.llm_temperature,
+                'llm_rate_limit_rpm': config.llm_rate_limit_rpm,
             })
         
         self.chunker = SemanticChunker(**chunker_kwargs)
         
         self.embedder = EmbeddingGenerator(
-            config.embedding_endpoint, config.embedding_model
+            config.embedding_endpoint,
+            config.embedding_model,
+            max_in_flight=config.embedding_max_in_flight,
+            max_retries=config.embedding_max_retries,
+        )
+        self.chroma = ChromaDBManager(
+            config.chroma_db_path,
+            f"docs_{int(time.time())}",
+            batch_size=config.chroma_batch_size,
         )
-        self.chroma = ChromaDBManager(config.chroma_db_path, f"docs_{int(time.time())}")
         self.logger = setup_logger("doc_parser")
         
         # Create cache directory in output directory
@@ -111,18 +135,23 @@ class DocumentParser:
         self.md_cache_dir = self.cache_dir / "markdown"
         self.md_cache_dir.mkdir(exist_ok=True)
 
-    def _get_cache_path(self, step: str, file_path: str) -> str:
-        """Generate a cache file path for a specific step and file."""
-        import hashlib
+        # Embeddings keyed by hash(model, embedded text), shared by every file
+        self.embedding_cache = EmbeddingCache(
+            str(self.cache_dir / "embeddings.sqlite"),
+            dtype=config.embedding_cache_dtype,
+        )
+
+        # Chunks whose embedding batch failed after retries, kept for a later run
+        self.failed_chunks_path = output_dir / "failed_chunks.jsonl"
 
-        file_hash = hashlib.md5(file_path.encode()).hexdigest()
-        return os.path.join(self.cache_dir, f"{step}_{file_hash}.pkl")
+    def _get_cache_path(self, step: str, file_path: str, extension: str = "json") -> str:
+        """Generate a cache file path for a specific step and file."""
+        file_hash = _path_hash(file_path)
+        return os.path.join(self.cache_dir, f"{step}_{file_hash}.{extension}")
     
     def _get_md_cache_path(self, file_path: str) -> str:
         """Generate a markdown cache file path."""
-        import hashlib
-        
-        file_hash = hashlib.md5(file_path.encode()).hexdigest()
+        file_hash = _path_hash(file_path)
         source_name = Path(file_path).stem
         return os.path.join(self.md_cache_dir, f"{source_name}_{file_hash}.md")
 
@@ -134,11 +163,14 @@ class DocumentParser:
         1. Discover all supported files in input_dir (recursive)
         2. Convert each file to markdown (parallel processing) - CACHED
         3. Chunk the markdown content - CACHED (including LLM linking if enabled)
-        4. Consolidate all markdown files
+        4. Consolidate all markdown files (unless config.consolidate is False)
         5. Generate embeddings for all chunks (batched, optionally with summary context) - CACHED
         6. Store in ChromaDB
         7. Clean up temp directory
         8. Save metadata and return output
+
+        Steps 2-6 are pipelined per file (see _run_pipeline), so file N can be
+        converting while earlier files are being chunked, embedded and stored.
         """
 
         # Step 1: File discovery
@@ -148,122 +180,25 @@ class DocumentParser:
         if not files:
             raise ValueError(f"No supported files found in {self.config.input_dir}")
 
-        # Step 2: Convert files to markdown with caching
-        converted_files = []
-        for file_path in files:
-            md_cache_path = self._get_md_cache_path(file_path)
-            
-            # Check if markdown cache exists
-            if os.path.exists(md_cache_path):
-                self.logger.debug(f"Loading cached markdown for {file_path}")
-                with open(md_cache_path, "r", encoding="utf-8") as f:
-                    md_content = f.read()
-            else:
-                self.logger.info(f"Converting {file_path} to markdown")
-                md_content = self.converter.convert_to_markdown(file_path)
-                # Save to markdown cache
-                with open(md_cache_path, "w", encoding="utf-8") as f:
-                    f.write(md_content)
-            
-            converted_files.append((file_path, md_content))
-
-        # Step 3: Chunk the markdown content with caching
-        # Note: Cache key includes LLM linking status to avoid stale cache
-        all_chunks = []
-        chunk_index_offset = 0
-        
-        llm_suffix = "_llm" if getattr(self.config, 'enable_llm_linking', False) else ""
-        
-        for file_path, md_content in converted_files:
-            cache_path = self._get_cache_path(f"chunks{llm_suffix}", file_path)
-            if os.path.exists(cache_path):
-                self.logger.debug(f"Loading cached chunks for {file_path}")
-                with open(cache_path, "rb") as f:
-                    chunks = pickle.load(f)
-            else:
-                self.logger.info(f"Chunking {file_path}" + 
-                               (" with LLM linking" if llm_suffix else ""))
-                
-                # Use async chunking if LLM linking is enabled
-                if getattr(self.config, 'enable_llm_linking', False):
-                    chunks = await self.chunker.chunk_markdown_async(md_content, file_path)
-                else:
-                    chunks = self.chunker.chunk_markdown(md_content, file_path)
-                
-                # Adjust chunk indices to be globally unique
-                for chunk in chunks:
-                    chunk.chunk_index += chunk_index_offset
-                chunk_index_offset += len(chunks)
-                with open(cache_path, "wb") as f:
-                    pickle.dump(chunks, f)
-            all_chunks.extend(chunks)
-
-        # Step 4: Consolidate all markdown files
-        for file_path, md_content in converted_files:
-            self.consolidator.append_document(md_content, file_path)
-        consolidated_path = self.consolidator.finalize()
-        self.logger.info(f"Created consolidated markdown: {consolidated_path}")
-
-        # Step 5: Generate embeddings with caching
-        if all_chunks:
-            self.logger.info(f"Generating embeddings for {len(all_chunks)} chunks")
-            
-            # Determine if we should include summary context in embeddings
-            include_summary = (
-                getattr(self.config, 'enable_llm_linking', False) and
-                getattr(self.config, 'embed_with_summary', True)
-            )
+        # Steps 2-6 run as a pipeline: convert -> chunk (+ consolidate) -> embed -> store
+        consolidate = self.config.consolidate
+        with self.consolidator if consolidate else contextlib.nullcontext():
+            chunk_metadata = await self._run_pipeline(files)
 
-            # Cache key includes summary status
-            embedding_suffix = "_with_summary" if include_summary else ""
+        consolidated_path = None
+        if consolidate:
+            consolidated_path = self.consolidator.finalize()
+            self.logger.info(f"Created consolidated markdown: {consolidated_path}")
 
-            # Load cached embeddings if available
-            embeddings = []
-            all_cached = True
-            for i, chunk in enumerate(all_chunks):
-                cache_path = self._get_cache_path(
-                    f"embedding{embedding_suffix}_{i}", chunk.id
-                )
-                if os.path.exists(cache_path):
-                    with open(cache_path, "rb") as f:
-                        embedding = pickle.load(f)
-                    embeddings.append(embedding)
-                else:
-                    # Mark that not all embeddings are cached
-                    all_cached = False
-                    break
-
-            # If not all embeddings were cached, generate them
-            if not all_cached:
-                self.logger.info(
-                    f"Generating embeddings" + 
-                    (" with summary context" if include_summary else "")
-                )
-                embeddings = await self.embedder.generate_embeddings(
-                    all_chunks,
-                    include_summary=include_summary
-                )
-                # Cache each embedding individually
-                for i, embedding in enumerate(embeddings):
-                    cache_path = self._get_cache_path(
-                        f"embedding{embedding_suffix}_{i}", all_chunks[i].id
-                    )
-                    with open(cache_path, "wb") as f:
-                        pickle.dump(embedding, f)
-            else:
-                self.logger.info(f"Loaded {len(embeddings)} cached embeddings")
-
-            # Step 6: Store in ChromaDB
-            self.logger.info("Storing in ChromaDB")
-            self.chroma.add_chunks(all_chunks, embeddings)
-        else:
+        if not chunk_metadata:
             self.logger.warning(
                 "No chunks were created, skipping embedding and ChromaDB steps"
             )
 
         # Step 7: Clean up cache directory
-        if getattr(self.config, 'cleanup_cache', True):
+        if self.config.cleanup_cache:
             import shutil
+            self.embedding_cache.close()
             if self.cache_dir.exists():
                 shutil.rmtree(self.cache_dir)
                 self.logger.info("Cleaned up cache directory")
@@ -274,41 +209,365 @@ class DocumentParser:
         output = DocParserOutput(
             consolidated_md_path=consolidated_path,
             chroma_collection_name=self.chroma.collection.name,
-            chunk_metadata=[chunk.to_dict() for chunk in all_chunks],
-            total_chunks=len(all_chunks),
-            processing_log=self.logger.handlers[0].baseFilename if self.logger.handlers else None,
+            chunk_metadata=chunk_metadata,
+            total_chunks=len(chunk_metadata),
+            processing_log=get_log_file(self.logger),
         )
         
         # Add LLM linking stats if enabled
-        if getattr(self.config, 'enable_llm_linking', False):
-            linked_chunks = sum(
-                1 for chunk in all_chunks 
-                if hasattr(chunk, 'summary_points') and chunk.summary_points
-            )
+        if self.config.enable_llm_linking:
+            linked_chunks = sum(1 for data in chunk_metadata if data["summary_points"])
             output.metadata = output.metadata or {}
             output.metadata['llm_linking_enabled'] = True
             output.metadata['chunks_with_summaries'] = linked_chunks
-            self.logger.info(f"LLM linking: {linked_chunks}/{len(all_chunks)} chunks have summaries")
+            self.logger.info(f"LLM linking: {linked_chunks}/{len(chunk_metadata)} chunks have summaries")
+
+        # File log output is buffered; write it out so processing_log is complete
+        for handler in self.logger.handlers:
+            handler.flush()
 
         return output
 
+    async def _run_pipeline(self, files: List[str]) -> List[Dict]:
+        """
+        Run conversion, chunking, embedding and storage as concurrent stages.
+
+        Stages are connected by bounded queues (config.pipeline_queue_size) so a
+        slow stage applies backpressure instead of buffering the whole corpus:
+
+        - convert workers: load cached markdown or convert in a process pool
+        - chunk workers: load cached chunks or chunk (config.chunker_file_concurrency)
+        - order worker (one): restores discovery order, consolidates
+        - embed workers: generate (or load cached) embeddings per file
+        - store worker (one): writes to ChromaDB in a thread
+
+        Returns every chunk's to_dict() form in discovery order (built once, for
+        the chunk cache, and reused for the output). Chunk objects themselves
+        are not kept: each file's chunks are released once they are stored.
+        """
+        queue_size = self.config.pipeline_queue_size
+        convert_q = asyncio.Queue(maxsize=queue_size)
+        chunk_q = asyncio.Queue(maxsize=queue_size)
+        order_q = asyncio.Queue(maxsize=queue_size)
+        embed_q = asyncio.Queue(maxsize=queue_size)
+        store_q = asyncio.Queue(maxsize=queue_size)
+        chunk_metadata = []
+
+        # Enough convert workers to keep both process pools busy
+        num_convert_workers = (
+            self.config.converter_workers or os.cpu_count() or 1
+        ) + self.config.pdf_converter_workers
+
+        with ProcessPoolExecutor(
+            max_workers=self.config.converter_workers
+        ) as pool, ProcessPoolExecutor(
+            max_workers=self.config.pdf_converter_workers
+        ) as pdf_pool:
+            workers = [
+                asyncio.create_task(
+                    self._convert_worker(convert_q, chunk_q, pool, pdf_pool)
+                )
+                for _ in range(num_convert_workers)
+            ]
+            workers.extend(
+                asyncio.create_task(self._chunk_worker(chunk_q, order_q))
+                for _ in range(self.config.chunker_file_concurrency)
+            )
+            workers.append(
+                asyncio.create_task(
+                    self._order_worker(order_q, embed_q, chunk_metadata)
+                )
+            )
+            workers.extend(
+                asyncio.create_task(self._embed_worker(embed_q, store_q))
+                for _ in range(self.config.embedding_max_in_flight)
+            )
+            workers.append(asyncio.create_task(self._store_worker(store_q)))
+
+            try:
+                for index, file_path in enumerate(files):
+                    await _wait_or_raise(convert_q.put((index, file_path)), workers)
+                # Drain stage by stage; each join returns once its queue is empty
+                for queue in (convert_q, chunk_q, order_q, embed_q, store_q):
+                    await _wait_or_raise(queue.join(), workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        return chunk_metadata
+
+    async def _convert_worker(
+        self,
+        convert_q: asyncio.Queue,
+        chunk_q: asyncio.Queue,
+        pool: ProcessPoolExecutor,
+        pdf_pool: ProcessPoolExecutor,
+    ):
+        """Load cached markdown or convert the file in a worker process."""
+        loop = asyncio.get_running_loop()
+        while True:
+            index, file_path = await convert_q.get()
+            md_cache_path = self._get_md_cache_path(file_path)
+
+            # Raw bytes: text mode would translate "\r\n" and differ from a fresh conversion
+            cached = await asyncio.to_thread(_read_cache, md_cache_path)
+            if cached is not None:
+                md_content = cached.decode("utf-8")
+                self.logger.debug(f"Loaded cached markdown for {file_path}")
+            else:
+                # PDFs go to a separate, smaller pool since each MinerU run is heavy
+                executor = pdf_pool if file_path.lower().endswith(".pdf") else pool
+                md_content = await loop.run_in_executor(
+                    executor, _convert_file, self.config, file_path
+                )
+                self.logger.info(f"Converted {file_path} to markdown")
+                # Save to markdown cache
+                with open(md_cache_path, "wb") as f:
+                    f.write(md_content.encode("utf-8"))
+
+            await chunk_q.put((index, file_path, md_content))
+            convert_q.task_done()
+
+    def _chunks_cache_key(self) -> str:
+        """Chunk cache step name; includes every chunker setting and LLM linking status to avoid stale cache."""
+        llm_suffix = "_llm" if self.chunker.enable_llm_linking else ""
+        return (
+            f"chunks_{self.chunker.chunking_mode}"
+            f"_{self.chunker.chunk_size}_{self.chunker.overlap}{llm_suffix}"
+        )
+
+    async def _chunk_worker(self, chunk_q: asyncio.Queue, order_q: asyncio.Queue):
+        """
+        Load cached chunks or chunk one file, in whatever order files arrive.
+
+        Several of these run at once (config.chunker_file_concurrency) so the
+        LLM linking requests of different files overlap; they all share the
+        one chunker, whose llm_semaphore still caps requests in flight.
+
+        Args:
+            chunk_q: Input queue of (index, file_path, md_content)
+            order_q: Output queue of (index, file_path, md_content, chunks,
+                chunk_dicts), chunk_dicts being None for freshly chunked files
+        """
+        enable_llm_linking = self.chunker.enable_llm_linking
+        chunks_key = self._chunks_cache_key()
+
+        while True:
+            index, file_path, md_content = await chunk_q.get()
+
+            cached = await asyncio.to_thread(
+                _read_cache, self._get_cache_path(chunks_key, file_path)
+            )
+            chunk_dicts = _load_json(cached) if cached is not None else None
+
+            if chunk_dicts is not None:
+                self.logger.debug(f"Loaded cached chunks for {file_path}")
+                chunks = [Chunk.from_dict(data) for data in chunk_dicts]
+            else:
+                self.logger.info(f"Chunking {file_path}" +
+                               (" with LLM linking" if enable_llm_linking else ""))
+
+                # Use async chunking if LLM linking is enabled
+                if enable_llm_linking:
+                    chunks = await self.chunker.chunk_markdown_async(md_content, file_path)
+                else:
+                    chunks = await asyncio.to_thread(
+                        self.chunker.chunk_markdown, md_content, file_path
+                    )
+
+            await order_q.put((index, file_path, md_content, chunks, chunk_dicts))
+            chunk_q.task_done()
+
+    async def _order_worker(
+        self,
+        order_q: asyncio.Queue,
+        embed_q: asyncio.Queue,
+        chunk_metadata: List[Dict],
+    ):
+        """
+        Finish chunked files in discovery order.
+
+        Conversions and chunking finish out of order; results wait in a buffer
+        until every earlier file has been handled so chunk indices, the
+        consolidated markdown and the embedding cache keys stay deterministic.
+
+        Args:
+            order_q: Input queue of (index, file_path, md_content, chunks, chunk_dicts)
+            embed_q: Output queue of (file_path, chunks)
+            chunk_metadata: List extended with each chunk's to_dict() form, in
+                order (the dicts written to / read from the chunk cache)
+        """
+        chunks_key = self._chunks_cache_key()
+        consolidate = self.config.consolidate
+        chunk_index_offset = 0
+        pending = {}
+        next_index = 0
+
+        while True:
+            index, *result = await order_q.get()
+            pending[index] = result
+
+            while next_index in pending:
+                file_path, md_content, chunks, chunk_dicts = pending.pop(next_index)
+                next_index += 1
+
+                if chunk_dicts is None:
+                    # Adjust chunk indices to be globally unique
+                    for chunk in chunks:
+                        chunk.chunk_index += chunk_index_offset
+                    chunk_index_offset += len(chunks)
+                    chunk_dicts = [chunk.to_dict() for chunk in chunks]
+                    with open(self._get_cache_path(chunks_key, file_path), "wb") as f:
+                        f.write(_dump_json(chunk_dicts))
+
+                if consolidate:
+                    self.consolidator.append_document(md_content, file_path)
+
+                if chunks:
+                    await embed_q.put((file_path, chunks))
+                chunk_metadata.extend(chunk_dicts)
+
+            order_q.task_done()
+
+    async def _embed_worker(self, embed_q: asyncio.Queue, store_q: asyncio.Queue):
+        """
+        Generate embeddings for one file's chunks, reusing cached vectors.
+
+        The cache is content-addressed (model + embedded text), so a chunk is
+        only re-embedded when its text changed, whichever file it came from.
+        """
+        # Determine if we should include summary context in embeddings
+        include_summary = (
+            self.config.enable_llm_linking and
+            self.config.embed_with_summary
+        )
+
+        while True:
+            file_path, chunks = await embed_q.get()
+            self.logger.info(
+                f"Generating embeddings for {len(chunks)} chunks" +
+                (" with summary context" if include_summary else "")
+            )
+            embeddings, failed = await self.embedder.generate_embeddings_isolated(
+                chunks,
+                include_summary=include_summary,
+                cache=self.embedding_cache,
+            )
+            if failed:
+                # Store what succeeded; failed chunks are not cached, so the next run retries them
+                self._quarantine_chunks(chunks, failed)
+                failed_positions = {position for position, _ in failed}
+                chunks = [
+                    chunk for position, chunk in enumerate(chunks)
+                    if position not in failed_positions
+                ]
+
+            if chunks:
+                await store_q.put((chunks, embeddings))
+            embed_q.task_done()
+
+    def _quarantine_chunks(self, chunks: List[Chunk], failed: List[Tuple[int, str]]):
+        """Append chunks whose embedding batch failed to failed_chunks.jsonl."""
+        self.logger.warning(
+            f"{len(failed)} chunks from {chunks[0].source_file} failed to embed; "
+            f"recorded in {self.failed_chunks_path}"
+        )
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        with open(self.failed_chunks_path, "a", encoding="utf-8") as f:
+            for position, error in failed:
+                chunk = chunks[position]
+                f.write(json.dumps({
+                    "id": chunk.id,
+                    "source_file": chunk.source_file,
+                    "chunk_index": chunk.chunk_index,
+                    "error": error,
+                    "timestamp": timestamp,
+                }) + "\n")
+
+    async def _store_worker(self, store_q: asyncio.Queue):
+        """Store chunks and embeddings in ChromaDB."""
+        while True:
+            chunks, embeddings = await store_q.get()
+            # Chroma writes are blocking; keep them off the event loop
+            await asyncio.to_thread(self.chroma.add_chunks, chunks, embeddings)
+            store_q.task_done()
+
     def _discover_files(self) -> List[str]:
         """Recursively find all supported files."""
-        files = []
-        for root, _, filenames in os.walk(self.config.input_dir):
-            for filename in filenames:
-                if Path(filename).suffix.lower() in self.config.supported_formats:
-                    files.append(os.path.join(root, filename))
-        return files
+        return list(
+            _scan_files(self.config.input_dir, self.config.supported_format_set)
+        )
+
+
+def _read_cache(path: str) -> Optional[bytes]:
+    """
+    Read a cache file's bytes, or None if it does not exist.
+
+    Opens directly instead of probing with exists(): a miss costs the same
+    one syscall as a stat. Called through asyncio.to_thread so cache hits do
+    not block the event loop.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+@functools.lru_cache(maxsize=65536)
+def _path_hash(file_path: str) -> str:
+    """
+    Hex digest naming a file's cache entries (same hash family as the embedding cache).
+
+    Memoized: each file's path is hashed by the convert, chunk and order stages.
+    """
+    return hashlib.blake2b(file_path.encode(), digest_size=16).hexdigest()
+
+
+def _scan_files(root: str, supported: frozenset):
+    """
+    Yield supported file paths under `root` in `os.walk` order.
 
+    Uses the `os.scandir` entries directly, so no per-directory name lists or
+    extra stat calls are needed; like `os.walk`, symlinked directories are
+    not followed and unreadable directories are skipped.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        return
 
-async def retry_with_backoff(func, max_retries=3, base_delay=1.0):
-    """Utility for retrying failed operations."""
-    for attempt in range(max_retries):
+    subdirs = []
+    for entry in entries:
         try:
-            return await func()
-        except Exception as e:
-            if attempt == max_retries - 1:
-                raise e
-            delay = base_delay * (2**attempt)  # Exponential backoff
-            await asyncio.sleep(delay)
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            if not entry.is_symlink():
+                subdirs.append(entry.path)
+        elif os.path.splitext(entry.name)[1].lower() in supported:
+            yield entry.path
+
+    for path in subdirs:
+        yield from _scan_files(path, supported)
+
+
+async def _wait_or_raise(awaitable, workers: List[asyncio.Task]):
+    """Await `awaitable`, re-raising the error if a pipeline worker fails first."""
+    future = asyncio.ensure_future(awaitable)
+    done, _ = await asyncio.wait(
+        [future, *workers], return_when=asyncio.FIRST_COMPLETED
+    )
+    if future not in done:
+        future.cancel()
+        for task in done:
+            task.result()
+    return future.result()
+
+
+def _convert_file(config: DocParserConfig, file_path: str) -> str:
+    """Convert one file in a worker process (module-level so it can be pickled)."""
+    return DocumentConverter(config).convert_to_markdown(file_path)
@@ -0,0 +1,26 @@
+from parser.chunks import _HEADER_RE, SemanticChunker
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("#　見出し", ("#", "見出し")),
+        ("　# H", ("#", "H")),
+        ("#\xa0H", ("#", "H")),
+        ("#\fH", ("#", "H")),
+        ("# ", None),
+        ("## \t", None),
+    ],
+)
+def test_header_re_matches_stripped_line(line, expected):
+    """Same result as matching ^(#{1,6})\\s+(.*)$ against line.strip()."""
+    match = _HEADER_RE.search(line)
+    assert (match.group(1, 2) if match else None) == expected
+
+
+def test_empty_header_does_not_split_section():
+    chunker = SemanticChunker(chunk_size=1000, overlap=0)
+    sections = list(chunker._iter_sections("# A\nintro\n## \nbody\n"))
+    assert sections == [("intro\n## \nbody\n", ((1, "A"),))]
@@ -5,13 +5,12 @@ client = PersistentClient(path="/run/media/blazingbhavneek/Common/Code/datagen/p
 cols = client.list_collections()
 print("collections:", len(cols), [c.name for c in cols])
 
-for c in cols:
-    col = client.get_collection(c.name)
-
+# list_collections() already returns collection handles; no get_collection round trip
+for col in cols:
     # count vectors
     count = col.count()
     
     # try reading creation time from metadata
-    # created = col.get()["metadata"].get("created_at", None)
+    # created = col.metadata.get("created_at", None)
     
-    print(f"{c.name}: chunks={count}")
+    print(f"{col.name}: chunks={count}")
@@ -1,34 +1,28 @@
-import asyncio
-import json
 import logging
 import os
-import pickle
-import re
-import subprocess
-import tempfile
 import time
-import uuid
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-
-import chromadb
-import docx
-import html2text
-import numpy as np
-import pandas as pd
-from bs4 import BeautifulSoup
-from chromadb.config import Settings
-from openai import OpenAI
-from pptx import Presentation
-from tqdm.asyncio import tqdm
+from logging.handlers import MemoryHandler, RotatingFileHandler
+from typing import Optional
+
+
+class _BufferedFileHandler(MemoryHandler):
+    """MemoryHandler that also closes the file handler it writes to"""
+
+    def close(self):
+        target = self.target
+        try:
+            super().close()
+        finally:
+            if target is not None:
+                target.close()
 
 
 def setup_logger(name: str, log_dir: str = "./logs") -> logging.Logger:
     """
     Create logger with file and console handlers
 
-    - Separate log file per agent instance
+    - Separate log file per agent instance, rotated at 10 MB (3 backups kept)
+    - File writes buffered: flushed every 1024 records, on WARNING and at exit
     - Timestamped entries
     - Configurable log level
     """
@@ -41,11 +35,19 @@ def setup_logger(name: str, log_dir: str = "./logs") -> logging.Logger:
     if logger.handlers:
         return logger
 
+    # Records are fully handled here; root handlers would print them a second time
+    logger.propagate = False
+
     # Create file handler
     log_file = os.path.join(log_dir, f"{name}_{int(time.time())}.log")
-    file_handler = logging.FileHandler(log_file)
+    file_handler = RotatingFileHandler(log_file, maxBytes=10_000_000, backupCount=3)
     file_handler.setLevel(logging.INFO)
 
+    # Batch file writes instead of one write per record
+    buffered_file_handler = _BufferedFileHandler(
+        1024, flushLevel=logging.WARNING, target=file_handler
+    )
+
     # Create console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
@@ -58,7 +60,16 @@ def setup_logger(name: str, log_dir: str = "./logs") -> logging.Logger:
     console_handler.setFormatter(formatter)
 
     # Add handlers to logger
-    logger.addHandler(file_handler)
+    logger.addHandler(buffered_file_handler)
     logger.addHandler(console_handler)
 
     return logger
+
+
+def get_log_file(logger: logging.Logger) -> Optional[str]:
+    """Path of the log file a setup_logger() logger writes to, if any"""
+    for handler in logger.handlers:
+        handler = getattr(handler, "target", handler)  # Unwrap the MemoryHandler
+        if isinstance(handler, logging.FileHandler):
+            return handler.baseFilename
+    return None